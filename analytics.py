@@ -0,0 +1,172 @@
+import threading
+import time
+from datetime import timedelta
+
+# cong don giao dich moi (id > last_id) vao rollup theo ngay. Chi lay giao dich cu hon
+# `lag` giay de khong bo sot transaction cua bot chua commit ma da lay id nho hon.
+# FOR UPDATE SKIP LOCKED: neu worker khac dang refresh thi bo qua luot nay
+_REFRESH_SQL = """
+WITH state AS (
+    SELECT last_id FROM dashboard_rollup_state WHERE name = 'transactions' FOR UPDATE SKIP LOCKED
+),
+bounds AS (
+    SELECT state.last_id AS lo, (
+        SELECT max(id) FROM (
+            SELECT t.id FROM transactions t
+            WHERE t.id > state.last_id AND t.timestamp < now() - make_interval(secs => %(lag)s)
+            ORDER BY t.id LIMIT %(batch)s
+        ) batch
+    ) AS hi
+    FROM state
+),
+new_tx AS (
+    SELECT t.guild_id, t.user_id, COALESCE(t.transaction_type, '') AS transaction_type,
+           COALESCE(t.amount_changed, 0) AS amount, t.timestamp::date AS day
+    FROM transactions t, bounds
+    WHERE t.id > bounds.lo AND t.id <= bounds.hi
+),
+daily AS (
+    INSERT INTO dashboard_daily_rollups AS r (guild_id, day, transaction_type, earned, spent, tx_count)
+    SELECT guild_id, day, transaction_type, SUM(GREATEST(amount, 0)), SUM(GREATEST(-amount, 0)), COUNT(*)
+    FROM new_tx GROUP BY guild_id, day, transaction_type
+    ON CONFLICT (guild_id, day, transaction_type) DO UPDATE
+    SET earned = r.earned + EXCLUDED.earned, spent = r.spent + EXCLUDED.spent, tx_count = r.tx_count + EXCLUDED.tx_count
+),
+per_user AS (
+    INSERT INTO dashboard_user_daily AS r (guild_id, user_id, day, earned, spent)
+    SELECT guild_id, user_id, day, SUM(GREATEST(amount, 0)), SUM(GREATEST(-amount, 0))
+    FROM new_tx GROUP BY guild_id, user_id, day
+    ON CONFLICT (guild_id, user_id, day) DO UPDATE
+    SET earned = r.earned + EXCLUDED.earned, spent = r.spent + EXCLUDED.spent
+)
+UPDATE dashboard_rollup_state s
+SET last_id = bounds.hi, updated_at = now()
+FROM bounds
+WHERE s.name = 'transactions' AND bounds.hi IS NOT NULL
+RETURNING (SELECT COUNT(*) FROM new_tx)
+"""
+
+
+class RollupRefresher:
+    """Cap nhat rollup giao dich theo ngay trong nen moi `interval` giay.
+    Lan chay dau tien tu backfill toan bo lich su theo tung lo `batch_size` giao dich."""
+
+    def __init__(self, connection, spawn, sleep, interval=60.0, lag_seconds=120, batch_size=50000):
+        self.connection = connection  # connection() -> context manager tra ve ket noi psycopg2
+        self._spawn = spawn
+        self._sleep = sleep
+        self.interval = interval
+        self.lag_seconds = lag_seconds
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stats = {'runs': 0, 'processed': 0, 'failures': 0, 'last_run_seconds': 0.0}
+
+    def start(self):
+        self._spawn(self._loop)
+
+    def refresh(self):
+        """Xu ly het giao dich moi, tra ve so giao dich da cong vao rollup."""
+        start = time.perf_counter()
+        total = 0
+        with self.connection() as conn:
+            while True:
+                with conn.cursor() as cur:
+                    cur.execute(_REFRESH_SQL, {'lag': self.lag_seconds, 'batch': self.batch_size})
+                    row = cur.fetchone()
+                conn.commit()
+                if not row or not row[0]:
+                    break
+                total += row[0]
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['processed'] += total
+            self._stats['last_run_seconds'] = time.perf_counter() - start
+        return total
+
+    def _loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Loi khi cap nhat rollup giao dich: {e}")
+                with self._lock:
+                    self._stats['failures'] += 1
+            self._sleep(self.interval)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def forget_guild(cur, guild_id):
+    """Xoa rollup cua guild (khi du lieu guild bi wipe)."""
+    cur.execute("DELETE FROM dashboard_daily_rollups WHERE guild_id = %s", (guild_id,))
+    cur.execute("DELETE FROM dashboard_user_daily WHERE guild_id = %s", (guild_id,))
+
+
+def load_analytics(cur, guild_id, days, top_n=10):
+    """Doc so lieu thong ke `days` ngay gan nhat cua guild tu rollup.
+
+    Luong coin theo ngay (supply) duoc tinh nguoc tu tong so du hien tai tru
+    di bien dong rong cua cac ngay sau do."""
+    cur.execute(
+        "SELECT current_date, COALESCE(SUM(balance), 0)::bigint, COUNT(*) FILTER (WHERE balance > 0) FROM users WHERE guild_id = %s",
+        (guild_id,)
+    )
+    today, supply, holders = cur.fetchone()
+    since = today - timedelta(days=days - 1)
+
+    cur.execute(
+        "SELECT day, transaction_type, earned, spent, tx_count FROM dashboard_daily_rollups "
+        "WHERE guild_id = %s AND day >= %s",
+        (guild_id, since)
+    )
+    earned = [0] * days
+    spent = [0] * days
+    by_type = {}
+    for day, transaction_type, day_earned, day_spent, tx_count in cur.fetchall():
+        i = (day - since).days
+        if i >= days:
+            continue  # lech gio giua bot va db
+        earned[i] += day_earned
+        spent[i] += day_spent
+        totals = by_type.setdefault(transaction_type or 'N/A', {'earned': 0, 'spent': 0, 'count': 0})
+        totals['earned'] += day_earned
+        totals['spent'] += day_spent
+        totals['count'] += tx_count
+
+    supply_series = [0] * days
+    running = supply
+    for i in range(days - 1, -1, -1):
+        supply_series[i] = running
+        running -= earned[i] - spent[i]
+
+    cur.execute(
+        "SELECT user_id, SUM(spent)::bigint AS total FROM dashboard_user_daily "
+        "WHERE guild_id = %s AND day >= %s GROUP BY user_id HAVING SUM(spent) > 0 ORDER BY total DESC LIMIT %s",
+        (guild_id, since, top_n)
+    )
+    top_spenders = cur.fetchall()
+
+    # dung index idx_users_guild_balance (guild_id, balance DESC, user_id)
+    cur.execute(
+        "SELECT user_id, balance FROM users WHERE guild_id = %s ORDER BY balance DESC, user_id LIMIT %s",
+        (guild_id, top_n)
+    )
+    leaderboard = cur.fetchall()
+
+    cur.execute("SELECT updated_at FROM dashboard_rollup_state WHERE name = 'transactions'")
+    state = cur.fetchone()
+
+    return {
+        'days': [(since + timedelta(days=i)).isoformat() for i in range(days)],
+        'earned': earned,
+        'spent': spent,
+        'supply': supply_series,
+        'current_supply': supply,
+        'holders': holders,
+        'by_type': by_type,
+        'top_spenders': top_spenders,
+        'leaderboard': leaderboard,
+        'updated_at': state[0].isoformat() if state and state[0] else None,
+    }
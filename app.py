@@ -1,15 +1,50 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ASYNC_MODE=eventlet|threading (mac dinh eventlet neu da cai). eventlet phai monkey-patch
+# truoc cac import ben duoi de requests, psycopg2, pool ket noi va fan_out khong chan hub
+import green_io
+ASYNC_MODE = green_io.setup(green_io.choose_mode(os.getenv("ASYNC_MODE")))
+
 import json
+import base64
+import time
 import psycopg2
 import requests
 import math
 import re
-import time
-from psycopg2.extras import Json, RealDictCursor
-from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, flash
-from flask_socketio import SocketIO
+import itertools
+from datetime import datetime
+from psycopg2.extras import RealDictCursor, execute_values
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, g, has_app_context
+from flask import before_render_template, template_rendered
+from flask_socketio import SocketIO, emit, join_room
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from discord_client import API_BASE_URL, DiscordClient
+from cache import DEFAULT_POLICIES, EntityCache, TTLCache
+from cache_events import CacheEvents, PostgresListener
+from cache_store import SQLiteStore
+from member_sync import MemberSync
+from migrations import run_migrations
+from db_pool import ConnectionPool
+from assets import IMMUTABLE_CACHE_CONTROL, AssetPipeline, choose_encoding, compress_response
+from image_proxy import CDN_BASE_URL, CdnFetcher, ImageProxy, ThumbnailCache, proxy_path, size_bucket, valid_path
+from fragments import GuildFragments, fragments_key
+from role_sync import parse_shop_role_rows, form_role_ids, rendered_role_ids, plan_role_sync, apply_role_sync
+from export import FORMATS as EXPORT_FORMATS, ExportError, build_filters, stream_transactions
+from analytics import RollupRefresher, forget_guild, load_analytics
+from config_store import ConfigStore, StaleConfigError
+from bulk_edit import BulkEditError, parse_user_ids, parse_csv, parse_json_changes, validate_changes, apply_bulk_edit
+from jobs import JobRunner
+from loader import RequestLoader
+from profiler import SamplingProfiler
+import metrics
+from log_stream import LogStream, GLOBAL_ROOM, guild_room
+from socketio_brokers import create_client_manager
 
 # load db functions tu du an bot
 import sys
@@ -25,44 +60,111 @@ except ImportError:
     db = None
 
 
-load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+BOT_TOKEN = os.getenv("BOT_TOKEN")
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-socketio = SocketIO(app)
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-API_BASE_URL = "https://discord.com/api/v10"
+# SOCKETIO_BROKER=postgres de chay nhieu worker (LISTEN/NOTIFY), bo trong neu chi co mot worker
+socketio_manager = create_client_manager(os.getenv("SOCKETIO_BROKER", ""), DATABASE_URL)
+socketio = SocketIO(app, async_mode=ASYNC_MODE, client_manager=socketio_manager)
+# khong chay neu I/O se chan hub: mot query/request Discord cham se treo moi request va log stream khac
+_io_problems = green_io.check(ASYNC_MODE, socketio.async_mode)
+if _io_problems:
+    raise RuntimeError("I/O co the chan event loop: " + "; ".join(_io_problems))
+
+# client REST dung chung (keep-alive + rate limit)
+discord_client = DiscordClient(
+    BOT_TOKEN,
+    base_url=os.getenv("DISCORD_API_BASE_URL", API_BASE_URL),  # bench tro toi fake API
+    timeout=(5, float(os.getenv("DISCORD_API_TIMEOUT", "15"))),
+    max_retries=int(os.getenv("DISCORD_API_MAX_RETRIES", "3")),
+) if BOT_TOKEN else None
+
+# pool ket noi postgres dung chung cho moi route
+db_pool = ConnectionPool(
+    DATABASE_URL,
+    max_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    connect=metrics.connect_instrumented,
+)
+
+# metrics cho /metrics
+REQUEST_DURATION = metrics.Histogram(
+    'dashboard_request_duration_seconds', 'Thoi gian xu ly request', ('route', 'method', 'status'))
+REQUEST_COMPONENT_DURATION = metrics.Histogram(
+    'dashboard_request_component_seconds', 'Thoi gian cua request danh cho Discord API, Postgres, dung fragment, render template',
+    ('route', 'component'))
+REQUEST_DB_QUERIES = metrics.Histogram(
+    'dashboard_request_db_queries', 'So query Postgres moi request', ('route',), buckets=metrics.COUNT_BUCKETS)
+DISCORD_REQUEST_DURATION = metrics.Histogram(
+    'dashboard_discord_request_duration_seconds', 'Thoi gian goi Discord API (ca thoi gian cho rate limit)',
+    ('method', 'status'))
+
+
+def _observe_discord(method, status, seconds):
+    DISCORD_REQUEST_DURATION.observe(seconds, method, str(status))
+    metrics.record('discord', seconds)
+
+
+if discord_client:
+    discord_client.observer = _observe_discord
+
+# profiler lay mau (tuy chon): ghi stack cua request cham hon PROFILE_SLOW_REQUESTS_MS
+profiler = SamplingProfiler(
+    os.getenv("PROFILE_DIR", "profiles"),
+    slow_ms=float(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0")),
+    green=ASYNC_MODE == 'eventlet',
+) if os.getenv("PROFILE_SLOW_REQUESTS_MS") else None
 
 # khoi tao db neu co the
 if db:
     db.init_db(DATABASE_URL)
 
 # cache
-_user_cache = {}
-_guild_members_cache = {}
-CACHE_DURATION_SECONDS = 300 # 5 phut
-
-def discord_api_request(endpoint, method='GET', payload=None):
-    if not BOT_TOKEN:
+# CACHE_EVENTS=1 khi bot gui su kien thay doi (trigger NOTIFY do run_migrations cai):
+# cache duoc cap nhat theo su kien, ttl chi con la du phong nen de dai hon
+CACHE_EVENTS = os.getenv("CACHE_EVENTS") == "1"
+CACHE_DURATION_SECONDS = int(os.getenv("CACHE_FALLBACK_TTL", "3600" if CACHE_EVENTS else "300"))
+# CACHE_DB_PATH: file SQLite luu snapshot cache Discord de worker moi/khoi dong lai khong phai goi lai API
+cache_store = SQLiteStore(os.getenv("CACHE_DB_PATH")) if os.getenv("CACHE_DB_PATH") else None
+entity_cache = EntityCache({
+    name: (CACHE_DURATION_SECONDS, DEFAULT_POLICIES[name][1]) for name in ('guild', 'channels', 'roles')
+}, store=cache_store)
+entity_cache.warm(max_age=int(os.getenv("CACHE_DB_MAX_AGE", "86400")))
+# tong so giao dich cua guild, chi dung de hien thi nen cho phep lech mot chut
+_transaction_count_cache = TTLCache('transaction_count', 600 if CACHE_EVENTS else 60, 256)
+# config da parse cua guild theo version; bot sua config thi trigger bao qua su kien 'config'
+config_store = ConfigStore(TTLCache('config', CACHE_DURATION_SECONDS if CACHE_EVENTS else 60, 512))
+# option channel/role da render cua trang edit_config, key theo hash channel/role nen khong can xoa
+_fragment_cache = TTLCache('fragments', 3600, 256)
+
+# css/js gop + minify + hash + nen san luc khoi dong; ASSETS_PIPELINE=0 khi sua static luc dev
+asset_pipeline = AssetPipeline(app.static_folder, enabled=os.getenv("ASSETS_PIPELINE", "1") == "1")
+asset_pipeline.build()
+# nen gzip/br HTML/JSON cua route; tat (COMPRESS_RESPONSES=0) neu reverse proxy da nen
+COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "1") == "1"
+
+# proxy avatar/icon: thumbnail theo bucket kich thuoc luu tren dia; IMAGE_ORIGIN_URL tro toi stand-in khi test
+image_proxy = ImageProxy(
+    ThumbnailCache(os.getenv("IMAGE_CACHE_DIR", "image_cache"), int(float(os.getenv("IMAGE_CACHE_MAX_MB", "200")) * 1024 * 1024)),
+    CdnFetcher(os.getenv("IMAGE_ORIGIN_URL", CDN_BASE_URL)),
+) if os.getenv("IMAGE_PROXY", "1") == "1" else None
+
+# so worker toi da khi goi Discord API song song
+FAN_OUT_MAX_WORKERS = int(os.getenv("FAN_OUT_MAX_WORKERS", "8"))
+
+def discord_api_request(endpoint, method='GET', payload=None, reason=None):
+    if not discord_client:
         return None
-    headers = {"Authorization": f"Bot {BOT_TOKEN}", "Content-Type": "application/json"}
+    res = None
     try:
-        if method == 'GET':
-            res = requests.get(f"{API_BASE_URL}{endpoint}", headers=headers)
-        elif method == 'POST':
-            res = requests.post(f"{API_BASE_URL}{endpoint}", headers=headers, json=payload)
-        elif method == 'PATCH':
-            res = requests.patch(f"{API_BASE_URL}{endpoint}", headers=headers, json=payload)
-        elif method == 'DELETE':
-            res = requests.delete(f"{API_BASE_URL}{endpoint}", headers=headers)
-        
+        res = discord_client.request(method, endpoint, payload=payload, reason=reason)
         res.raise_for_status()
         return res.json() if res.status_code != 204 else None
     except requests.RequestException as e:
         print(f"Loi goi API Discord toi {endpoint}: {e}")
-        if 'res' in locals() and res is not None:
+        if res is not None:
              print(f"Response body: {res.text}")
         return None
 
@@ -71,19 +173,11 @@ def get_user_info(user_id):
     if not user_id_str or not user_id_str.isdigit():
         return {'id': user_id_str, 'name': 'N/A', 'avatar_url': "https://cdn.discordapp.com/embed/avatars/0.png"}
 
-    if user_id_str in _user_cache:
-        return _user_cache[user_id_str]
-    
-    user_data = discord_api_request(f"/users/{user_id_str}")
-    if user_data:
-        avatar_hash = user_data.get('avatar')
-        info = {
-            'id': user_id_str,
-            'name': user_data.get('global_name') or user_data.get('username', f'Unknown User {user_id_str}'),
-            'avatar_url': f"https://cdn.discordapp.com/avatars/{user_id_str}/{avatar_hash}.png" if avatar_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
-        }
-        _user_cache[user_id_str] = info
-        return info
+    info = entity_cache['user'].get_or_load(user_id_str, lambda: _fetch_user_info(user_id_str))
+    return info or _unknown_user(user_id_str)
+
+
+def _unknown_user(user_id_str):
     return {
         'id': user_id_str,
         'name': f'Unknown User {user_id_str}',
@@ -91,13 +185,404 @@ def get_user_info(user_id):
     }
 
 
+def _fetch_user_info(user_id_str):
+    if not discord_client:
+        return None
+    try:
+        res = discord_client.request('GET', f"/users/{user_id_str}")
+    except requests.RequestException as e:
+        print(f"Loi goi API Discord toi /users/{user_id_str}: {e}")
+        return None
+    if res.status_code == 404:
+        # user khong ton tai: cache luon de khong goi lai moi lan xem trang
+        return _unknown_user(user_id_str)
+    if not res.ok:
+        print(f"Loi goi API Discord toi /users/{user_id_str}: {res.status_code} {res.text}")
+        return None
+    return _user_info_from(res.json())
+
+
+def _user_info_from(user_data):
+    user_id_str = str(user_data['id'])
+    avatar_hash = user_data.get('avatar')
+    return {
+        'id': user_id_str,
+        'name': user_data.get('global_name') or user_data.get('username', f'Unknown User {user_id_str}'),
+        'avatar_url': f"https://cdn.discordapp.com/avatars/{user_id_str}/{avatar_hash}.png" if avatar_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
+    }
+
+
+# cac ham get_guild_* dung chung cache, khong sua truc tiep gia tri tra ve
+def get_guild_details(guild_id):
+    return entity_cache['guild'].get_or_load(str(guild_id), lambda: _fetch_guild_details(guild_id))
+
+
+def _fetch_guild_details(guild_id):
+    guild_details = discord_api_request(f"/guilds/{guild_id}")
+    if guild_details:
+        icon_hash = guild_details.get('icon')
+        guild_details['icon_url'] = f"https://cdn.discordapp.com/icons/{guild_id}/{icon_hash}.png" if icon_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
+    return guild_details
+
+
+def get_guild_channels(guild_id):
+    return entity_cache['channels'].get_or_load(str(guild_id), lambda: discord_api_request(f"/guilds/{guild_id}/channels"))
+
+
+def get_guild_roles(guild_id):
+    return entity_cache['roles'].get_or_load(str(guild_id), lambda: discord_api_request(f"/guilds/{guild_id}/roles"))
+
+
+def _fetch_members_page(guild_id, after, limit):
+    return discord_api_request(f"/guilds/{guild_id}/members?limit={limit}&after={after}")
+
+
+# danh sach member day du cua guild, sync nen theo tung trang
+member_sync = MemberSync(_fetch_members_page, refresh_interval=CACHE_DURATION_SECONDS)
+
+# so request /users/{id} toi da chay cung luc khi tra cuu hang loat
+USER_LOOKUP_MAX_WORKERS = int(os.getenv("USER_LOOKUP_MAX_WORKERS", "5"))
+
+
+def resolve_users(user_ids, member_index=None):
+    """Tra cuu nhieu user mot luc, tra ve {str(user_id): info}.
+    Thu tu: member index cua guild, cache user, roi moi goi API song song cho phan con thieu."""
+    result = {}
+    misses = []
+    user_cache = entity_cache['user']
+    for user_id_str in {str(uid) for uid in user_ids}:
+        if not user_id_str.isdigit():
+            result[user_id_str] = get_user_info(user_id_str)
+            continue
+        member = member_index.get(user_id_str) if member_index is not None else None
+        if member:
+            result[user_id_str] = {'id': user_id_str, 'name': member.name, 'avatar_url': member.avatar_url}
+            continue
+        info = user_cache.get(user_id_str)
+        if info:
+            result[user_id_str] = info
+        else:
+            misses.append(user_id_str)
+
+    for user_id_str, info in zip(misses, fan_out(get_user_info, misses, max_workers=USER_LOOKUP_MAX_WORKERS)):
+        result[user_id_str] = info or _unknown_user(user_id_str)
+    return result
+
+
+def fan_out(func, items, max_workers=None):
+    """Goi func cho tung item song song (gioi han so worker), tra ve ket qua dung thu tu items.
+    Item nao loi se tra ve None."""
+    items = list(items)
+    if not items:
+        return []
+
+    def _safe_call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            print(f"Loi khi xu ly {item}: {e}")
+            return None
+
+    workers = min(len(items), max_workers or FAN_OUT_MAX_WORKERS)
+    if workers <= 1:
+        return [_safe_call(item) for item in items]
+    # moi item mot ban copy context de metrics cua request theo sang thread con
+    contexts = [copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda ctx, item: ctx.run(_safe_call, item), contexts, items))
+
+
+def _guild_summary(guild_id):
+    guild_info = get_guild_details(guild_id)
+    if guild_info:
+        return {
+            'id': guild_id,
+            'name': guild_info.get('name', f'Unknown Server {guild_id}'),
+            'icon_url': guild_info['icon_url']
+        }
+    return _guild_placeholder(guild_id)
+
+
+def _guild_placeholder(guild_id):
+    return {
+        'id': guild_id,
+        'name': f'Server ID: {guild_id} (Không thể lấy thông tin)',
+        'icon_url': "https://cdn.discordapp.com/embed/avatars/0.png"
+    }
+
+
 def get_db_connection():
+    """Lay ket noi tu pool. Trong mot request, moi lan goi tra ve cung mot ket noi,
+    ket noi duoc tra lai pool khi request ket thuc (khong goi conn.close())."""
+    if has_app_context() and 'db_conn' in g:
+        return g.db_conn
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
+        conn = db_pool.acquire()
     except Exception as e:
         print(f"Loi ket noi database: {e}")
         return None
+    if has_app_context():
+        g.db_conn = conn
+    return conn
+
+
+def add_server_timing(value):
+    """Them thoi gian cac nguon du lieu vao header Server-Timing cua response."""
+    if value:
+        g.setdefault('server_timing', []).append(value)
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.request_stats = metrics.start_request()
+    if profiler:
+        profiler.begin()
+
+
+@before_render_template.connect_via(app)
+def _start_render_timer(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def _stop_render_timer(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        metrics.record('render', time.perf_counter() - started)
+
+
+@app.teardown_request
+def end_request_metrics(exc):
+    metrics.end_request()
+    if profiler:
+        # after_request bi bo qua khi request loi
+        profiler.discard()
+
+
+@app.after_request
+def set_server_timing(response):
+    timings = g.get('server_timing')
+    if timings:
+        response.headers['Server-Timing'] = ", ".join(timings)
+    return response
+
+
+@app.after_request
+def compress_html(response):
+    if COMPRESS_RESPONSES:
+        return compress_response(response, request.accept_encodings)
+    return response
+
+
+@app.context_processor
+def asset_helpers():
+    def asset_urls(bundle):
+        # pipeline tat: tung file goc trong static/
+        name = asset_pipeline.hashed_name(bundle)
+        if name:
+            return [url_for('asset', name=name)]
+        return [url_for('static', filename=source) for source in asset_pipeline.sources(bundle)]
+    return {'asset_urls': asset_urls}
+
+
+@app.template_filter('thumb')
+def thumb_url(url, display_size):
+    """URL thumbnail qua proxy cho anh hien thi o `display_size` px (lay gap doi cho man hinh HiDPI)."""
+    path = proxy_path(url) if image_proxy else None
+    if not path:
+        return url
+    return url_for('image', path=path, size=size_bucket(display_size * 2))
+
+
+@app.route('/img/<path:path>')
+def image(path):
+    size_str = request.args.get('size', '')
+    if not image_proxy or not valid_path(path):
+        return Response("Not found", status=404, mimetype='text/plain')
+    size = size_bucket(int(size_str) if size_str.isdigit() else 0)
+    fmt = image_proxy.choose_format(request.accept_mimetypes)
+    origin_url = f"{CDN_BASE_URL}/{path}?size={size}"
+    try:
+        found = image_proxy.thumbnail(path, size, fmt)
+    except Exception as e:
+        # proxy loi thi de trinh duyet lay thang tu CDN
+        print(f"Loi khi tao thumbnail {path}: {e}")
+        return redirect(origin_url)
+    if not found:
+        return redirect(origin_url)
+    data, etag = found
+    response = Response(status=304) if request.if_none_match.contains(etag) else Response(data, mimetype=f"image/{fmt}")
+    response.set_etag(etag)
+    response.vary.add('Accept')
+    # path chua hash cua anh: anh doi thi url doi
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@app.route('/assets/<name>')
+def asset(name):
+    found = asset_pipeline.get(name)
+    if not found:
+        return Response("Not found", status=404, mimetype='text/plain')
+    encoding = choose_encoding(request.accept_encodings, found.variants)
+    etag = found.etag if encoding == 'identity' else f"{found.etag}-{encoding}"
+    not_modified = request.if_none_match.contains(etag)
+    asset_pipeline.record(not_modified)
+    response = Response(status=304) if not_modified else Response(found.variants[encoding], mimetype=found.content_type)
+    if encoding != 'identity' and not not_modified:
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    stats = g.get('request_stats')
+    if started is None or stats is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_DURATION.observe(elapsed, route, request.method, str(response.status_code))
+    for component, seconds in stats.seconds.items():
+        REQUEST_COMPONENT_DURATION.observe(seconds, route, component)
+    REQUEST_DB_QUERIES.observe(stats.counts['db'], route)
+    add_server_timing(", ".join(
+        f"{component};dur={seconds * 1000:.1f}" for component, seconds in stats.seconds.items()
+    ))
+    if profiler:
+        path = profiler.end(route, elapsed * 1000)
+        if path:
+            print(f"Request cham {route} ({elapsed * 1000:.0f}ms), stack ghi tai {path}")
+    return response
+
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+
+# tao cac index con thieu cho bang cua bot
+if DATABASE_URL:
+    run_migrations(db_pool.connection, cache_events=CACHE_EVENTS)
+
+
+def _delete_role_job(guild_id, role_id):
+    if not discord_client:
+        return False
+    res = discord_client.request('DELETE', f"/guilds/{guild_id}/roles/{role_id}", reason="Server data wipe from dashboard")
+    # 404: role da bi xoa tu truoc
+    return res.status_code in (204, 404)
+
+
+# job chay nen cho cac thao tac Discord hang loat, tien do gui qua socketio
+job_runner = JobRunner(db_pool.connection, fan_out, notify=socketio.emit, concurrency=int(os.getenv("JOB_CONCURRENCY", "4")))
+job_runner.register('delete_roles', _delete_role_job, on_finish=lambda guild_id, job: entity_cache.invalidate('roles', guild_id))
+if DATABASE_URL:
+    job_runner.start()
+
+# rollup giao dich theo ngay cho trang thong ke
+rollup_refresher = RollupRefresher(
+    db_pool.connection, socketio.start_background_task, socketio.sleep,
+    interval=float(os.getenv("ANALYTICS_REFRESH_SECONDS", "60")),
+)
+if DATABASE_URL:
+    rollup_refresher.start()
+# ket qua API thong ke, rollup chi doi moi phut nen cache ngan la du
+_analytics_cache = TTLCache('analytics', 60, 256)
+ANALYTICS_MAX_DAYS = 365
+
+
+# so dong doc moi lan khi quet index so du
+BALANCE_SCAN_BATCH = 500
+
+
+def _balance_page(cur, guild_id, candidate_ids, is_candidate, offset, limit):
+    """Phan trang member theo so du giam dan (bang nhau thi theo id).
+
+    Nguoi co so du > 0 doc theo index (guild_id, balance DESC, user_id) tung khoi
+    BALANCE_SCAN_BATCH dong (keyset), loc member bang is_candidate va dung khi du trang.
+    Sau do la member so du 0 (ke ca chua co trong db) theo id, cuoi cung la so du am."""
+    needed = offset + limit
+    positive = []
+    last = None
+    while len(positive) < needed:
+        if last is None:
+            cur.execute(
+                """
+                SELECT user_id, balance FROM users
+                WHERE guild_id = %s AND balance > 0
+                ORDER BY balance DESC, user_id LIMIT %s
+                """,
+                (guild_id, BALANCE_SCAN_BATCH)
+            )
+        else:
+            cur.execute(
+                """
+                SELECT user_id, balance FROM users
+                WHERE guild_id = %s AND balance > 0 AND balance <= %s AND (balance < %s OR user_id > %s)
+                ORDER BY balance DESC, user_id LIMIT %s
+                """,
+                (guild_id, last['balance'], last['balance'], last['user_id'], BALANCE_SCAN_BATCH)
+            )
+        rows = cur.fetchall()
+        positive.extend((r['user_id'], r['balance']) for r in rows if is_candidate(r['user_id']))
+        if len(rows) < BALANCE_SCAN_BATCH:
+            break
+        last = rows[-1]
+    if len(positive) >= needed:
+        return positive[offset:needed]
+
+    # da het nguoi co so du > 0: so du am thuong rat it
+    cur.execute(
+        "SELECT user_id, balance FROM users WHERE guild_id = %s AND balance < 0 ORDER BY balance DESC, user_id",
+        (guild_id,)
+    )
+    negative = [(r['user_id'], r['balance']) for r in cur.fetchall() if is_candidate(r['user_id'])]
+    nonzero = {uid for uid, _ in positive}
+    nonzero.update(uid for uid, _ in negative)
+    rows = positive[offset:]
+    rest = itertools.chain(((uid, 0) for uid in candidate_ids if uid not in nonzero), negative)
+    start = max(0, offset - len(positive))
+    rows.extend(itertools.islice(rest, start, start + limit - len(rows)))
+    return rows
+
+
+def encode_history_cursor(row, direction):
+    raw = json.dumps({'t': row['timestamp'].isoformat(), 'i': row['id'], 'd': direction})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_history_cursor(token):
+    """Tra ve (timestamp, id, direction) hoac None neu token khong hop le.
+    Token bi sua (timestamp/id sai kieu) cung tra None de quay ve trang dau, khong loi SQL."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        if data['d'] not in ('next', 'prev'):
+            return None
+        timestamp = datetime.fromisoformat(data['t'])
+        row_id = int(data['i'])
+        if not 0 <= row_id < 2 ** 63:
+            return None
+        return timestamp, row_id, data['d']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _count_transactions(guild_id):
+    conn = get_db_connection()
+    if not conn:
+        return None
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM transactions WHERE guild_id = %s", (guild_id,))
+        return cur.fetchone()[0]
+
 
 def parse_form_data(form):
     config = defaultdict(dict)
@@ -225,7 +710,16 @@ def parse_form_data(form):
                 "answer_description": qna_descs[i]
             })
 
-    return json.loads(json.dumps(config))
+    return _to_plain(config)
+
+
+def _to_plain(value):
+    # defaultdict -> dict de ghi/so sanh voi config trong db
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    return value
 
 
 @app.route('/')
@@ -238,30 +732,27 @@ def index():
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT guild_id FROM guild_configs ORDER BY guild_id;")
         guilds_data = cur.fetchall()
-    conn.close()
+    conn.commit()
     
-    guilds_details = []
-    for row in guilds_data:
-        guild_id = row['guild_id']
-        guild_info = discord_api_request(f"/guilds/{guild_id}")
-        if guild_info:
-            icon_hash = guild_info.get('icon')
-            icon_url = f"https://cdn.discordapp.com/icons/{guild_id}/{icon_hash}.png" if icon_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
-            guilds_details.append({
-                'id': guild_id,
-                'name': guild_info.get('name', f'Unknown Server {guild_id}'),
-                'icon_url': icon_url
-            })
-        else:
-            guilds_details.append({
-                'id': guild_id,
-                'name': f'Server ID: {guild_id} (Không thể lấy thông tin)',
-                'icon_url': "https://cdn.discordapp.com/embed/avatars/0.png"
-            })
+    guild_ids = [row['guild_id'] for row in guilds_data]
+    guilds_details = [
+        summary or _guild_placeholder(guild_id)
+        for guild_id, summary in zip(guild_ids, fan_out(_guild_summary, guild_ids))
+    ]
     
     return render_template('index.html', guilds=guilds_details)
 
 
+def _load_config_rows(conn, guild_id):
+    config_entry = config_store.get(conn, guild_id)
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT role_id, price, creator_id FROM shop_roles WHERE guild_id = %s ORDER BY price ASC", (guild_id,))
+        shop_roles_db = cur.fetchall()
+
+    conn.commit()
+    return config_entry, shop_roles_db
+
+
 @app.route('/edit/<int:guild_id>', methods=['GET', 'POST'])
 def edit_config(guild_id):
     conn = get_db_connection()
@@ -271,131 +762,115 @@ def edit_config(guild_id):
 
     if request.method == 'POST':
         config_data_json = parse_form_data(request.form)
+        version_str = request.form.get('config_version', '')
+        expected_version = int(version_str) if version_str.isdigit() else None
+
+        # kiem tra version truoc khi sua role tren Discord
+        config_store.invalidate(guild_id)
+        config_entry = config_store.get(conn, guild_id)
+        if not config_entry or config_entry.version != expected_version:
+            flash("Cấu hình đã được thay đổi ở nơi khác sau khi bạn mở trang. Vui lòng kiểm tra lại và lưu lần nữa.", "warning")
+            return redirect(url_for('edit_config', guild_id=guild_id))
 
         try:
+            form_roles = parse_shop_role_rows(request.form)
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    "UPDATE guild_configs SET config_data = %s WHERE guild_id = %s;",
-                    (Json(config_data_json), guild_id)
-                )
-                
-                form_role_ids = request.form.getlist('shop_role_id[]')
-                form_role_names = request.form.getlist('shop_role_name[]')
-                form_role_prices = request.form.getlist('shop_role_price[]')
-                form_role_colors = request.form.getlist('shop_role_color[]')
-                form_role_creators = request.form.getlist('shop_role_creator_id[]')
+                cur.execute("SELECT role_id, price, creator_id FROM shop_roles WHERE guild_id = %s", (guild_id,))
+                db_roles = {row['role_id']: row for row in cur.fetchall()}
+            # khong giu transaction trong luc goi Discord
+            conn.commit()
 
-                cur.execute("SELECT role_id FROM shop_roles WHERE guild_id = %s", (guild_id,))
-        
-                db_role_ids = {row['role_id'] for row in cur.fetchall()}
-
-                form_role_ids = request.form.getlist('shop_role_id[]')
-                valid_form_role_ids = {int(rid) for rid in form_role_ids if rid}
-
-                roles_to_delete = db_role_ids - valid_form_role_ids
-
-                if roles_to_delete:
-                    for del_id in roles_to_delete:
-                        discord_api_request(f"/guilds/{guild_id}/roles/{del_id}", method='DELETE')
-                    
-                    cur.execute("DELETE FROM shop_roles WHERE guild_id = %s AND role_id = ANY(%s)", (guild_id, list(roles_to_delete)))
-
-
-                for i, role_name in enumerate(form_role_names):
-                    role_name = role_name.strip()
-                    if not (role_name and form_role_prices[i]):
-                        continue
-                    
-                    price = int(form_role_prices[i])
-                    creator_id = int(form_role_creators[i]) if form_role_creators[i] else None
-                    hex_color = (form_role_colors[i] or '#99aab5').lstrip('#')
-                    color_int = int(hex_color, 16)
-                    
-                    role_id = form_role_ids[i] if form_role_ids[i] else None
-
-                    if role_id:
-                        # check role nay co phai role shop ko
-                        cur.execute("SELECT 1 FROM shop_roles WHERE role_id = %s AND guild_id = %s", (int(role_id), guild_id))
-                        if cur.fetchone() is None:
-                            flash(f"Lỗi bảo mật: Đã cố gắng chỉnh sửa role ID {role_id} không thuộc shop.", "danger")
-                            continue
-                        
-                        payload = {'name': role_name, 'color': color_int}
-                        discord_api_request(f"/guilds/{guild_id}/roles/{role_id}", method='PATCH', payload=payload)
-                    else:
-                        payload = {'name': role_name, 'color': color_int}
-                        created_role = discord_api_request(f"/guilds/{guild_id}/roles", method='POST', payload=payload)
-                        if created_role:
-                            role_id = created_role['id']
-                        else:
-                            flash(f"Không thể tạo role '{role_name}'.", "danger")
-                            continue
-                    
-                    if role_id:
-                        cur.execute(
-                            """
-                            INSERT INTO shop_roles (guild_id, role_id, price, creator_id) VALUES (%s, %s, %s, %s)
-                            ON CONFLICT (role_id) DO UPDATE SET price = EXCLUDED.price
-                            """,
-                            (guild_id, int(role_id), price, creator_id)
-                        )
+            # lay role moi nhat de bo qua cac role khong doi ten/mau
+            entity_cache.invalidate('roles', guild_id)
+            plan = plan_role_sync(
+                form_roles, db_roles, get_guild_roles(guild_id) or [],
+                form_role_ids(request.form), rendered_role_ids(request.form)
+            )
+            for role_id in plan['rejected']:
+                flash(f"Lỗi bảo mật: Đã cố gắng chỉnh sửa role ID {role_id} không thuộc shop.", "danger")
+
+            saved_roles, failed_names = apply_role_sync(plan, guild_id, discord_api_request, fan_out)
+            for role_name in failed_names:
+                flash(f"Không thể tạo role '{role_name}'.", "danger")
+
+            upsert_rows = [
+                (guild_id, r['role_id'], r['price'], r['creator_id'])
+                for r in saved_roles
+                if r['role_id'] not in db_roles or db_roles[r['role_id']]['price'] != r['price']
+            ]
+
+            # role tren Discord da doi: ghi shop_roles trong transaction rieng, luon commit
+            # (khong phu thuoc version config, shop_roles khong nam trong config_data)
+            with conn.cursor() as cur:
+                if plan['delete']:
+                    cur.execute("DELETE FROM shop_roles WHERE guild_id = %s AND role_id = ANY(%s)", (guild_id, plan['delete']))
+                if upsert_rows:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO shop_roles (guild_id, role_id, price, creator_id) VALUES %s
+                        ON CONFLICT (role_id) DO UPDATE SET price = EXCLUDED.price
+                        """,
+                        upsert_rows
+                    )
+            conn.commit()
+            roles_changed = bool(plan['delete'] or upsert_rows or plan['update'])
 
+            with conn.cursor() as cur:
+                config_store.save(cur, guild_id, expected_version, config_data_json)
             conn.commit()
             flash(f"Đã cập nhật thành công cấu hình cho Server ID: {guild_id}", "success")
             # gui event reload cho bot
             socketio.emit('config_updated', {'guild_id': str(guild_id)})
+        except StaleConfigError:
+            conn.rollback()
+            flash("Cấu hình đã được thay đổi ở nơi khác trong lúc lưu, thay đổi cấu hình chưa được ghi (role shop đã được cập nhật). Vui lòng kiểm tra lại và lưu lần nữa.", "warning")
+            if roles_changed:
+                socketio.emit('config_updated', {'guild_id': str(guild_id)})
         except Exception as e:
             conn.rollback()
             flash(f"Lỗi khi cập nhật database: {e}", "danger")
         finally:
-            conn.close()
+            # role tren Discord co the da bi sua du db loi
+            entity_cache.invalidate('roles', guild_id)
+            config_store.invalidate(guild_id)
         
         return redirect(url_for('edit_config', guild_id=guild_id))
 
-    # GET
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("SELECT config_data FROM guild_configs WHERE guild_id = %s;", (guild_id,))
-        db_result = cur.fetchone()
-
-        cur.execute("SELECT role_id, price, creator_id FROM shop_roles WHERE guild_id = %s ORDER BY price ASC", (guild_id,))
-        shop_roles_db = cur.fetchall()
-
-    conn.close()
-
-    if not db_result:
+    # GET: db va Discord API duoc tai song song
+    loader = RequestLoader()
+    loader.add('db_config', _load_config_rows, conn, guild_id)
+    loader.add('discord_guild', get_guild_details, guild_id)
+    loader.add('discord_channels', get_guild_channels, guild_id)
+    loader.add('discord_roles', get_guild_roles, guild_id)
+    if db:
+        loader.add('db_custom_roles', db.get_all_custom_roles_for_guild, guild_id)
+    loaded = loader.run()
+
+    config_entry, shop_roles_db = loaded['db_config'] or (None, [])
+    guild_details = loaded['discord_guild']
+    all_channels = loaded['discord_channels']
+    all_roles_raw = loaded['discord_roles']
+    custom_roles_db = loaded.get('db_custom_roles') or []
+
+    if not config_entry:
         flash(f"Không tìm thấy cấu hình cho Server ID: {guild_id}", "warning")
         return redirect(url_for('index'))
     
-    config = db_result['config_data'] or {}
-
-    keys_to_ensure = {
-        "MESSAGES": {}, "FOOTER_MESSAGES": {}, 
-        "CURRENCY_RATES": {"default": {}, "categories": {}, "channels": {}},
-        "CUSTOM_ROLE_CONFIG": {}, "QNA_DATA": [],
-        "BOOSTER_MULTIPLIER_CONFIG": {},
-        "REGULAR_USER_ROLE_CREATION": {},
-        "CUSTOM_ROLE_PING_ROLES": []
-    }
-    for key, default_value in keys_to_ensure.items():
-        if key not in config:
-            config[key] = default_value
-    
-    guild_details = discord_api_request(f"/guilds/{guild_id}")
-    if guild_details:
-        icon_hash = guild_details.get('icon')
-        guild_details['icon_url'] = f"https://cdn.discordapp.com/icons/{guild_id}/{icon_hash}.png" if icon_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
-    
-    all_channels = discord_api_request(f"/guilds/{guild_id}/channels")
-    all_roles_raw = discord_api_request(f"/guilds/{guild_id}/roles")
-    
-    text_channels, category_channels, rateable_channels = [], [], []
-    if all_channels:
-        text_channels = [ch for ch in all_channels if ch['type'] == 0]
-        category_channels = [ch for ch in all_channels if ch['type'] == 4]
-        rateable_channels = [ch for ch in all_channels if ch['type'] in [0, 5, 15]]
+    # config trong cache dung chung giua cac request, khong sua truc tiep
+    config = config_entry.config
     
+    # option <select> cua channel/role render san, dung lai toi khi channel/role cua guild doi
+    with metrics.track('fragments'):
+        fragments = _fragment_cache.get_or_load(
+            fragments_key(guild_id, all_channels, all_roles_raw),
+            lambda: GuildFragments(all_channels, all_roles_raw)
+        )
+
     creator_ids = {r['creator_id'] for r in shop_roles_db if r['creator_id']}
-    user_details = {str(uid): get_user_info(uid) for uid in creator_ids}
+    loader.add('discord_users', resolve_users, creator_ids | {cr['user_id'] for cr in custom_roles_db}, member_sync.peek(guild_id))
+    user_details = loader.run()['discord_users'] or {}
+    add_server_timing(loader.server_timing())
 
     role_id_to_details_map = {str(r['id']): {'name': r['name'], 'color': f"#{r['color']:06x}" if r['color'] != 0 else '#000000'} for r in all_roles_raw} if all_roles_raw else {}
     shop_roles_with_details = []
@@ -411,7 +886,6 @@ def edit_config(guild_id):
             })
 
     # lay ds custom role
-    custom_roles_db = db.get_all_custom_roles_for_guild(guild_id) if db else []
     custom_roles_details = []
     if custom_roles_db and all_roles_raw:
         # tao map de tra cuu nhanh
@@ -420,7 +894,8 @@ def edit_config(guild_id):
             role_info = role_info_map.get(str(cr['role_id']))
             if role_info:
                 custom_roles_details.append({
-                    'user_info': get_user_info(cr['user_id']),
+                    # nguon discord_users loi thi user_details rong
+                    'user_info': user_details.get(str(cr['user_id'])) or _unknown_user(str(cr['user_id'])),
                     'role_info': {
                         'id': role_info['id'],
                         'name': role_info['name'],
@@ -433,16 +908,33 @@ def edit_config(guild_id):
         'edit_config.html', 
         guild_id=guild_id, 
         config=config, 
+        config_version=config_entry.version,
         guild=guild_details,
-        text_channels=text_channels,
-        category_channels=category_channels,
-        rateable_channels=rateable_channels,
+        fragments=fragments,
+        ping_role_ids=[str(role_id) for role_id in config.get('CUSTOM_ROLE_PING_ROLES', [])],
         shop_roles=shop_roles_with_details,
-        all_roles=all_roles_raw or [],
         user_details=user_details,
         custom_roles_details=custom_roles_details # truyen vao template
     )
 
+@app.route('/api/guild/<int:guild_id>/config')
+def api_config(guild_id):
+    """Config da chuan hoa cua guild. Ho tro If-None-Match theo version config."""
+    conn = get_db_connection()
+    if not conn:
+        return {'error': 'Không thể kết nối database'}, 503
+    config_entry = config_store.get(conn, guild_id)
+    if not config_entry:
+        return {'error': 'Không tìm thấy cấu hình'}, 404
+    if request.if_none_match.contains(config_entry.etag):
+        response = Response(status=304)
+    else:
+        response = app.json.response({'version': config_entry.version, 'config': config_entry.config})
+    response.set_etag(config_entry.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @app.route('/wipe/<int:guild_id>', methods=['POST'])
 def wipe_server_data(guild_id):
     if not db:
@@ -453,18 +945,19 @@ def wipe_server_data(guild_id):
         # 1. Xoa du lieu db va lay ve ID role can xoa tren Discord
         role_ids_to_delete = db.wipe_guild_data(guild_id)
         
-        # 2. Xoa role tren Discord
-        deleted_count = 0
-        for role_id in role_ids_to_delete:
-            try:
-                # ly do de log
-                reason = "Server data wipe from dashboard"
-                discord_api_request(f"/guilds/{guild_id}/roles/{role_id}?reason={reason}", method='DELETE')
-                deleted_count += 1
-            except Exception as e:
-                print(f"Khong the xoa role {role_id} cua guild {guild_id}: {e}")
+        # 2. Xoa role tren Discord trong nen, tien do gui qua event job_progress
+        if role_ids_to_delete:
+            job_runner.submit(guild_id, 'delete_roles', [str(rid) for rid in role_ids_to_delete])
+
+        conn = get_db_connection()
+        if conn:
+            with conn.cursor() as cur:
+                forget_guild(cur, guild_id)
+            conn.commit()
+            _analytics_cache.clear()
+        config_store.invalidate(guild_id)
         
-        flash(f"Đã xóa thành công toàn bộ dữ liệu của server {guild_id}. {deleted_count} role đã bị xóa khỏi Discord.", "success")
+        flash(f"Đã xóa thành công toàn bộ dữ liệu của server {guild_id}. {len(role_ids_to_delete)} role đang được xóa khỏi Discord trong nền.", "success")
 
     except Exception as e:
         flash(f"Đã xảy ra lỗi nghiêm trọng khi xóa dữ liệu server: {e}", "danger")
@@ -479,72 +972,63 @@ def members(guild_id):
         flash("Không thể kết nối đến cơ sở dữ liệu!", "danger")
         return redirect(url_for('edit_config', guild_id=guild_id))
 
-    guild_details = discord_api_request(f"/guilds/{guild_id}")
+    guild_details = get_guild_details(guild_id)
     if not guild_details:
         flash(f"Không thể lấy thông tin server {guild_id}", "danger")
         return redirect(url_for('index'))
     
-    guild_id_str = str(guild_id)
-    now = time.time()
-    api_members = []
-    
-    if guild_id_str in _guild_members_cache and (now - _guild_members_cache[guild_id_str]['timestamp'] < CACHE_DURATION_SECONDS):
-        api_members = _guild_members_cache[guild_id_str]['data']
-    else:
-        fetched_members = discord_api_request(f"/guilds/{guild_id}/members?limit=1000")
-        if fetched_members is not None:
-            api_members = fetched_members
-            _guild_members_cache[guild_id_str] = {'data': api_members, 'timestamp': now}
-    
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("SELECT user_id, balance FROM users WHERE guild_id = %s", (guild_id,))
-        db_users_list = cur.fetchall()
-    conn.close()
-    
-    db_users_map = {str(u['user_id']): u for u in db_users_list}
+    member_index = member_sync.get(guild_id)
 
     search_query = request.args.get('search', '').strip().lower()
-    if search_query:
-        filtered_members = []
-        for member in api_members:
-            user_info = member.get('user', {})
-            display_name = (user_info.get('global_name') or user_info.get('username', '')).lower()
-            if search_query in display_name:
-                filtered_members.append(member)
-        api_members = filtered_members
-    
-    members_data = []
-    for member in api_members:
-        user = member.get('user', {})
-        user_id_str = user.get('id')
-        if not user_id_str or user.get('bot'):
-            continue
-            
-        avatar_hash = user.get('avatar')
-        avatar_url = f"https://cdn.discordapp.com/avatars/{user_id_str}/{avatar_hash}.png" if avatar_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
-        
-        db_info = db_users_map.get(user_id_str, {})
-
-        members_data.append({
-            'id': user_id_str,
-            'name': user.get('global_name') or user.get('username'),
-            'discriminator': user.get('discriminator'),
-            'avatar_url': avatar_url,
-            'balance': db_info.get('balance', 0)
-        })
-
-    page = request.args.get('page', 1, type=int)
-    per_page = 24 
-    total_members = len(members_data)
-    total_pages = math.ceil(total_members / per_page)
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'name', 'balance'):
+        sort = 'id'
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = 24
     offset = (page - 1) * per_page
-    paginated_members = members_data[offset : offset + per_page]
+
+    # chi truy van db cho cac member cua trang hien tai
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        if sort == 'balance':
+            candidate_ids = member_index.search_ids(search_query)
+            total_members = len(candidate_ids)
+            if search_query:
+                is_candidate = set(candidate_ids).__contains__
+            else:
+                # khong tim kiem: moi member khong phai bot (giong search_ids)
+                def is_candidate(uid):
+                    member = member_index.get(uid)
+                    return member is not None and not member.bot
+            page_rows = _balance_page(cur, guild_id, candidate_ids, is_candidate, offset, per_page)
+            page_members = [(member_index.get(uid), balance) for uid, balance in page_rows]
+        else:
+            total_members, entries = member_index.page(search_query, sort, offset, per_page)
+            cur.execute(
+                "SELECT user_id, balance FROM users WHERE guild_id = %s AND user_id = ANY(%s)",
+                (guild_id, [m.id for m in entries])
+            )
+            balances = {r['user_id']: r['balance'] for r in cur.fetchall()}
+            page_members = [(m, balances.get(m.id, 0)) for m in entries]
+    conn.commit()
+
+    paginated_members = [
+        {
+            'id': str(member.id),
+            'name': member.name,
+            'discriminator': member.discriminator,
+            'avatar_url': member.avatar_url,
+            'balance': balance
+        }
+        for member, balance in page_members if member
+    ]
+    total_pages = math.ceil(total_members / per_page)
 
     return render_template(
         'members.html', 
         guild=guild_details, 
         members=paginated_members, 
         search_query=search_query,
+        sort=sort,
         page=page,
         total_pages=total_pages,
         guild_id=guild_id
@@ -557,7 +1041,7 @@ def edit_member(guild_id, user_id):
         flash("Không thể kết nối database!", "danger")
         return redirect(url_for('members', guild_id=guild_id))
 
-    guild_details = discord_api_request(f"/guilds/{guild_id}")
+    guild_details = get_guild_details(guild_id)
     if not guild_details:
         flash("Không thể lấy thông tin server", "danger")
         return redirect(url_for('index'))
@@ -595,8 +1079,6 @@ def edit_member(guild_id, user_id):
         except Exception as e:
             flash(f"Lỗi khi cập nhật: {e}", "danger")
             conn.rollback()
-        finally:
-            conn.close()
         return redirect(url_for('members', guild_id=guild_id))
 
     # GET
@@ -613,16 +1095,15 @@ def edit_member(guild_id, user_id):
         cur.execute("SELECT * FROM transactions WHERE guild_id = %s AND user_id = %s ORDER BY timestamp DESC LIMIT 10", (guild_id, user_id))
         transactions = cur.fetchall()
 
-    conn.close()
+    conn.commit()
 
     if not user_db_data:
-        with get_db_connection() as c:
-            with c.cursor() as cur:
-                cur.execute("INSERT INTO users (user_id, guild_id, balance) VALUES (%s, %s, 0) ON CONFLICT DO NOTHING", (user_id, guild_id))
-                c.commit()
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO users (user_id, guild_id, balance) VALUES (%s, %s, 0) ON CONFLICT DO NOTHING", (user_id, guild_id))
+        conn.commit()
         return edit_member(guild_id, user_id)
 
-    user_api_data = get_user_info(user_id)
+    user_api_data = dict(get_user_info(user_id))
     if not user_api_data:
         flash("Không thể lấy thông tin người dùng từ Discord.", "danger")
         return redirect(url_for('members', guild_id=guild_id))
@@ -633,6 +1114,90 @@ def edit_member(guild_id, user_id):
 
     return render_template('edit_member.html', guild=guild_details, user=full_user_data, transactions=transactions, guild_id=guild_id)
 
+# so thanh vien toi da cho mot lan sua hang loat
+BULK_EDIT_MAX_ROWS = int(os.getenv("BULK_EDIT_MAX_ROWS", "5000"))
+
+
+def _run_bulk_edit(conn, guild_id, changes, mode, note):
+    changes = validate_changes(changes, BULK_EDIT_MAX_ROWS)
+    try:
+        with conn.cursor() as cur:
+            rows = apply_bulk_edit(cur, guild_id, changes, mode, note)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    _transaction_count_cache.invalidate(str(guild_id))
+    return rows
+
+
+@app.route('/edit/<int:guild_id>/members/bulk', methods=['GET', 'POST'])
+def bulk_edit_members(guild_id):
+    guild_details = get_guild_details(guild_id)
+    if not guild_details:
+        flash("Không thể lấy thông tin server", "danger")
+        return redirect(url_for('index'))
+
+    results = None
+    if request.method == 'POST':
+        conn = get_db_connection()
+        if not conn:
+            flash("Không thể kết nối database!", "danger")
+            return redirect(url_for('members', guild_id=guild_id))
+
+        mode = request.form.get('mode', 'add')
+        note = (request.form.get('note') or '').strip() or 'Bulk Edit'
+        upload = request.files.get('csv_file')
+        try:
+            if upload and upload.filename:
+                changes = parse_csv(upload.read().decode('utf-8-sig'))
+            else:
+                changes = parse_user_ids(request.form.get('user_ids'), request.form.get('amount'), request.form.get('fake_boosts'))
+            rows = _run_bulk_edit(conn, guild_id, changes, mode, note)
+            flash(f"Đã cập nhật {len(rows)} thành viên.", "success")
+            # chi lay ten tu member index da co, khong goi API cho tung user
+            member_index = member_sync.peek(guild_id)
+            results = []
+            for user_id, old_balance, new_balance in rows:
+                entry = member_index.get(user_id) if member_index else None
+                results.append({
+                    'id': user_id,
+                    'name': entry.name if entry else None,
+                    'old_balance': old_balance,
+                    'new_balance': new_balance,
+                })
+        except BulkEditError as e:
+            flash(str(e), "danger")
+        except UnicodeDecodeError:
+            flash("File CSV phải được lưu với mã hóa UTF-8.", "danger")
+        except Exception as e:
+            flash(f"Lỗi khi cập nhật: {e}", "danger")
+
+    return render_template('bulk_edit.html', guild=guild_details, results=results, max_rows=BULK_EDIT_MAX_ROWS, guild_id=guild_id)
+
+
+@app.route('/api/guild/<int:guild_id>/members/bulk', methods=['POST'])
+def api_bulk_edit_members(guild_id):
+    """JSON: {"mode": "add"|"set", "note": "...", "changes": [{"user_id": ..., "amount": ..., "fake_boosts": ...}]}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {'error': 'Body phải là JSON object.'}, 400
+    conn = get_db_connection()
+    if not conn:
+        return {'error': 'Không thể kết nối database'}, 503
+    try:
+        rows = _run_bulk_edit(conn, guild_id, parse_json_changes(data.get('changes')), data.get('mode', 'add'), data.get('note') or 'Bulk Edit')
+    except BulkEditError as e:
+        return {'error': str(e)}, 400
+    except psycopg2.Error as e:
+        return {'error': str(e)}, 500
+    return {
+        'updated': len(rows),
+        # id dang chuoi vi snowflake vuot qua do chinh xac so cua JavaScript
+        'changes': [{'user_id': str(u), 'old_balance': old, 'new_balance': new} for u, old, new in rows],
+    }
+
+
 @app.route('/edit/<int:guild_id>/history')
 def history(guild_id):
     conn = get_db_connection()
@@ -640,70 +1205,259 @@ def history(guild_id):
         flash("Không thể kết nối database!", "danger")
         return redirect(url_for('edit_config', guild_id=guild_id))
 
-    guild_details = discord_api_request(f"/guilds/{guild_id}")
+    guild_details = get_guild_details(guild_id)
     if not guild_details:
         flash("Không thể lấy thông tin server", "danger")
         return redirect(url_for('index'))
     
-    page = request.args.get('page', 1, type=int)
     per_page = 20
-    offset = (page - 1) * per_page
+    cursor = decode_history_cursor(request.args.get('cursor', ''))
     
+    # phan trang keyset theo (timestamp, id), dung index idx_transactions_guild_ts_id
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("SELECT COUNT(*) as total FROM transactions WHERE guild_id = %s", (guild_id,))
-        total_transactions = cur.fetchone()['total']
-        
-        cur.execute("SELECT * FROM transactions WHERE guild_id = %s ORDER BY timestamp DESC LIMIT %s OFFSET %s", (guild_id, per_page, offset))
+        if cursor is None:
+            cur.execute("""
+                SELECT * FROM transactions WHERE guild_id = %s
+                ORDER BY timestamp DESC, id DESC LIMIT %s
+                """, (guild_id, per_page + 1))
+        elif cursor[2] == 'next':
+            cur.execute("""
+                SELECT * FROM transactions WHERE guild_id = %s AND (timestamp, id) < (%s, %s)
+                ORDER BY timestamp DESC, id DESC LIMIT %s
+                """, (guild_id, cursor[0], cursor[1], per_page + 1))
+        else:
+            cur.execute("""
+                SELECT * FROM transactions WHERE guild_id = %s AND (timestamp, id) > (%s, %s)
+                ORDER BY timestamp ASC, id ASC LIMIT %s
+                """, (guild_id, cursor[0], cursor[1], per_page + 1))
         transactions_raw = cur.fetchall()
-    conn.close()
+    conn.commit()
+
+    has_more = len(transactions_raw) > per_page
+    transactions_raw = transactions_raw[:per_page]
+    if cursor and cursor[2] == 'prev':
+        transactions_raw.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = cursor is not None, has_more
+
+    next_cursor = encode_history_cursor(transactions_raw[-1], 'next') if has_next and transactions_raw else None
+    prev_cursor = encode_history_cursor(transactions_raw[0], 'prev') if has_prev and transactions_raw else None
+    total_transactions = _transaction_count_cache.get_or_load(str(guild_id), lambda: _count_transactions(guild_id))
     
-    members_map = {}
-    api_members = discord_api_request(f"/guilds/{guild_id}/members?limit=1000")
-    if api_members:
-        for member_data in api_members:
-            user = member_data.get('user', {})
-            user_id = user.get('id')
-            if user_id:
-                avatar_hash = user.get('avatar')
-                members_map[int(user_id)] = {
-                    'name': user.get('global_name') or user.get('username'),
-                    'avatar_url': f"https://cdn.discordapp.com/avatars/{user_id}/{avatar_hash}.png" if avatar_hash else "https://cdn.discordapp.com/embed/avatars/0.png"
-                }
+    users = resolve_users([t['user_id'] for t in transactions_raw], member_sync.get(guild_id))
 
     transactions = []
     for t in transactions_raw:
-        user_id = t['user_id']
-        if user_id in members_map:
-            t['user_info'] = members_map[user_id]
-        else:
-            t['user_info'] = get_user_info(user_id)
+        t['user_info'] = users[str(t['user_id'])]
         transactions.append(t)
 
-    total_pages = math.ceil(total_transactions / per_page)
-
     return render_template(
         'history.html', 
         guild=guild_details, 
         transactions=transactions,
-        page=page,
-        total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total_transactions=total_transactions,
         guild_id=guild_id
     )
 
+@app.route('/edit/<int:guild_id>/history/export')
+def export_history(guild_id):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        flash(f"Định dạng '{fmt}' không được hỗ trợ.", "danger")
+        return redirect(url_for('history', guild_id=guild_id))
+    try:
+        where, params = build_filters(guild_id, request.args)
+    except ExportError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('history', guild_id=guild_id))
+
+    # ket noi rieng cho export: giu den khi gui xong file, khong dung ket noi cua request
+    try:
+        conn = db_pool.acquire()
+    except Exception as e:
+        print(f"Loi ket noi database: {e}")
+        flash("Không thể kết nối database!", "danger")
+        return redirect(url_for('history', guild_id=guild_id))
+
+    response = Response(stream_transactions(conn, where, params, fmt), mimetype=EXPORT_FORMATS[fmt])
+    response.call_on_close(lambda: db_pool.release(conn))
+    filename = f"transactions-{guild_id}-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/edit/<int:guild_id>/analytics')
+def analytics(guild_id):
+    guild_details = get_guild_details(guild_id)
+    if not guild_details:
+        flash("Không thể lấy thông tin server", "danger")
+        return redirect(url_for('index'))
+    return render_template('analytics.html', guild=guild_details, guild_id=guild_id)
+
+
+def _load_guild_analytics(guild_id, days):
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        with conn.cursor() as cur:
+            data = load_analytics(cur, guild_id, days)
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Loi khi doc thong ke guild {guild_id}: {e}")
+        return None
+
+    users = resolve_users([uid for uid, _ in data['top_spenders'] + data['leaderboard']], member_sync.peek(guild_id))
+
+    def with_user(user_id, key, value):
+        info = users[str(user_id)]
+        # id dang chuoi vi snowflake vuot qua do chinh xac so cua JavaScript
+        return {'user_id': str(user_id), 'name': info['name'], 'avatar_url': info['avatar_url'], key: value}
+
+    data['top_spenders'] = [with_user(uid, 'spent', spent) for uid, spent in data['top_spenders']]
+    data['leaderboard'] = [with_user(uid, 'balance', balance) for uid, balance in data['leaderboard']]
+    return data
+
+
+@app.route('/api/guild/<int:guild_id>/analytics')
+def api_analytics(guild_id):
+    days = request.args.get('days', '30')
+    days = min(int(days), ANALYTICS_MAX_DAYS) if days.isdigit() and int(days) > 0 else 30
+    data = _analytics_cache.get_or_load(f"{guild_id}:{days}", lambda: _load_guild_analytics(guild_id, days))
+    if data is None:
+        return {'error': 'Không thể đọc dữ liệu thống kê'}, 503
+    return data
+
 @app.route('/edit/<int:guild_id>/logs')
 def logs(guild_id):
-    guild_details = discord_api_request(f"/guilds/{guild_id}")
+    guild_details = get_guild_details(guild_id)
     if not guild_details:
         flash("Không thể lấy thông tin server", "danger")
         return redirect(url_for('index'))
     
     return render_template('logs.html', guild=guild_details, guild_id=guild_id)
 
+@app.route('/metrics')
+def metrics_endpoint():
+    lines = []
+    for histogram in (REQUEST_DURATION, REQUEST_COMPONENT_DURATION, REQUEST_DB_QUERIES, DISCORD_REQUEST_DURATION):
+        lines.extend(histogram.render())
+    if discord_client:
+        lines.extend(metrics.render_stats('dashboard_discord_client', 'Thong ke client Discord', discord_client.stats()))
+    lines.extend(metrics.render_stats('dashboard_cache', 'Thong ke cache entity', entity_cache.stats(), label_name='entity'))
+    if cache_store:
+        lines.extend(metrics.render_stats('dashboard_cache_store', 'Thong ke cache SQLite', cache_store.stats()))
+    lines.extend(metrics.render_stats('dashboard_assets', 'Thong ke asset tinh', asset_pipeline.stats()))
+    if image_proxy:
+        lines.extend(metrics.render_stats('dashboard_image_cache', 'Thong ke cache thumbnail', image_proxy.cache.stats()))
+    lines.extend(metrics.render_stats('dashboard_fragment_cache', 'Thong ke cache fragment HTML', _fragment_cache.stats()))
+    lines.extend(metrics.render_stats('dashboard_db_pool', 'Thong ke pool Postgres', db_pool.stats()))
+    lines.extend(metrics.render_stats('dashboard_member_sync', 'Thong ke sync member', member_sync.stats()))
+    lines.extend(metrics.render_stats('dashboard_log_stream', 'Thong ke phat log', log_stream.stats()))
+    lines.extend(metrics.render_stats('dashboard_analytics_rollup', 'Thong ke cap nhat rollup', rollup_refresher.stats()))
+    lines.extend(metrics.render_stats('dashboard_cache_events', 'Thong ke su kien cap nhat cache', cache_events.stats()))
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
 # SocketIO handlers
+# su kien thay doi tu bot/trigger: cap nhat cache ngay thay vi doi het ttl
+cache_events = CacheEvents()
+
+
+def _on_member_upsert(event):
+    member = event.get('member') or {}
+    member_sync.apply_member(event['guild_id'], member)
+    if member.get('user', {}).get('id'):
+        entity_cache['user'].set(str(member['user']['id']), _user_info_from(member['user']))
+
+
+def _on_user_update(event):
+    entity_cache['user'].set(str(event['user']['id']), _user_info_from(event['user']))
+
+
+def _update_cached_roles(guild_id, update):
+    # chi sua khi roles cua guild dang co trong cache; tao list moi vi request khac co the dang doc list cu
+    cache = entity_cache['roles']
+    roles = cache.get(str(guild_id))
+    if roles is not None:
+        cache.set(str(guild_id), update(list(roles)))
+
+
+def _on_role_upsert(event):
+    role = event['role']
+
+    def update(roles):
+        for i, r in enumerate(roles):
+            if str(r.get('id')) == str(role['id']):
+                roles[i] = role
+                return roles
+        return roles + [role]
+    _update_cached_roles(event['guild_id'], update)
+
+
+def _on_role_remove(event):
+    role_id = str(event['role_id'])
+    _update_cached_roles(event['guild_id'], lambda roles: [r for r in roles if str(r.get('id')) != role_id])
+
+
+cache_events.on('member_upsert', _on_member_upsert)
+cache_events.on('member_remove', lambda e: member_sync.remove_member(e['guild_id'], e['user_id']))
+cache_events.on('user_update', _on_user_update)
+cache_events.on('role_upsert', _on_role_upsert)
+cache_events.on('role_remove', _on_role_remove)
+cache_events.on('guild_update', lambda e: entity_cache.invalidate('guild', e['guild_id']))
+cache_events.on('channels_update', lambda e: entity_cache.invalidate('channels', e['guild_id']))
+cache_events.on('config', lambda e: config_store.invalidate(e['guild_id']))
+cache_events.on('transactions', lambda e: _transaction_count_cache.invalidate(str(e['guild_id'])))
+
+if DATABASE_URL and CACHE_EVENTS:
+    PostgresListener(DATABASE_URL, 'dashboard_cache', cache_events.apply, socketio.start_background_task, socketio.sleep).start()
+
+
+# log tu bot: giu lich su theo guild, gom lai va phat theo room
+log_stream = LogStream(socketio.emit, socketio.start_background_task, socketio.sleep)
+
+
+def _handle_app_message(data):
+    # log do bot gui toi worker khac: chi luu lich su, client da nhan qua broker
+    if data.get('type') == 'log':
+        log_stream.remember(data['entry'])
+    elif data.get('type') == 'cache':
+        cache_events.apply(data['event'])
+
+
+if socketio_manager:
+    socketio_manager.on_app_message(_handle_app_message)
+    # bat dau nghe broker ngay, khong doi client dau tien ket noi
+    socketio.server.manager_initialized = True
+    socketio_manager.initialize()
+
+
 @socketio.on('new_log')
 def handle_new_log(data):
-    # Phat lai log cho tat ca client dang xem trang log
-    socketio.emit('log_entry', data, broadcast=True)
+    if isinstance(data, dict):
+        entry = log_stream.publish(data)
+        if socketio_manager:
+            socketio_manager.publish_app_message({'type': 'log', 'entry': entry})
+
+
+@socketio.on('cache_event')
+def handle_cache_event(data):
+    # su kien do bot gui; worker khac nhan qua broker
+    if isinstance(data, dict) and cache_events.apply(data) and socketio_manager:
+        socketio_manager.publish_app_message({'type': 'cache', 'event': data})
+
+
+@socketio.on('join_logs')
+def handle_join_logs(data):
+    guild_id = str((data or {}).get('guild_id', ''))
+    if not guild_id.isdigit():
+        return
+    join_room(GLOBAL_ROOM)
+    join_room(guild_room(guild_id))
+    emit('log_history', {'entries': log_stream.history(guild_id)})
 
 if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# file gop tu static/ luc khoi dong, phuc vu tu bo nho duoi ten co hash noi dung
+BUNDLES = {
+    'app.css': ('base.css', 'layout.css', 'components.css', 'animations.css'),
+    'app.js': ('app.js',),
+}
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# response dong duoc nen neu lon hon COMPRESS_MIN_SIZE byte
+COMPRESS_MIMETYPES = ('text/html', 'application/json')
+COMPRESS_MIN_SIZE = 1024
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+
+def minify_css(text):
+    """Bo comment va khoang trang thua, giu nguyen chuoi trong dau nhay."""
+    parts = []
+    last = 0
+    for match in _CSS_TOKENS.finditer(text):
+        parts.append(_squeeze_css(text[last:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        last = match.end()
+    parts.append(_squeeze_css(text[last:]))
+    return ''.join(parts).strip()
+
+
+def _squeeze_css(chunk):
+    chunk = re.sub(r'\s+', ' ', chunk)
+    chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+    # chi bo khoang trang sau ':' ("div :hover" khac "div:hover")
+    chunk = re.sub(r':\s+', ':', chunk)
+    return chunk.replace(';}', '}')
+
+
+def minify_js(text):
+    """Minify an toan (khong parse JS): bo thut dau dong, dong trong va dong chi co comment //.
+    Giu xuong dong de khong doi nghia cua cac cau lenh khong co dau ';'.
+    Dong nam trong template literal nhieu dong duoc giu nguyen."""
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+class Asset:
+    __slots__ = ('name', 'content_type', 'etag', 'variants')
+
+    def __init__(self, name, content_type, data, etag):
+        self.name = name
+        self.content_type = content_type
+        self.etag = etag
+        self.variants = {'identity': data, 'gzip': gzip.compress(data, 9, mtime=0)}
+        if brotli:
+            self.variants['br'] = brotli.compress(data, quality=11)
+        # chi giu ban nen neu thuc su nho hon
+        for encoding in ('gzip', 'br'):
+            if encoding in self.variants and len(self.variants[encoding]) >= len(data):
+                del self.variants[encoding]
+
+
+def choose_encoding(accept_encodings, available):
+    """Chon br > gzip > identity theo header Accept-Encoding (werkzeug Accept)."""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+
+class AssetPipeline:
+    """Gop + minify + hash + nen truoc cac bundle trong BUNDLES.
+
+    Ten file co hash noi dung nen duoc cache vinh vien (immutable); doi noi dung la doi ten.
+    Cac worker build giong nhau nen ra cung ten file. enabled=False (dev) thi template
+    dung thang file goc trong static/."""
+
+    def __init__(self, static_dir, bundles=BUNDLES, enabled=True):
+        self.static_dir = static_dir
+        self.bundles = bundles
+        self.enabled = enabled
+        self._assets = {}  # ten co hash -> Asset
+        self._names = {}  # ten bundle -> ten co hash
+        self._lock = threading.Lock()
+        self._stats = {'served': 0, 'not_modified': 0, 'source_bytes': 0, 'minified_bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0}
+
+    def build(self):
+        if not self.enabled:
+            return
+        assets, names = {}, {}
+        stats = {'source_bytes': 0, 'minified_bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0}
+        for bundle, sources in self.bundles.items():
+            stem, ext = os.path.splitext(bundle)
+            chunks = []
+            for source in sources:
+                with open(os.path.join(self.static_dir, source), encoding='utf-8') as f:
+                    text = f.read()
+                stats['source_bytes'] += len(text.encode('utf-8'))
+                chunks.append(MINIFIERS[ext](text))
+            # js: xuong dong giua cac file de tranh dinh cau lenh cuoi khong co ';'
+            data = ('\n' if ext == '.js' else '').join(chunks).encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            name = f"{stem}.{digest[:12]}{ext}"
+            asset = assets[name] = Asset(name, CONTENT_TYPES[ext], data, digest[:16])
+            names[bundle] = name
+            stats['minified_bytes'] += len(data)
+            stats['gzip_bytes'] += len(asset.variants.get('gzip', data))
+            stats['br_bytes'] += len(asset.variants.get('br', b''))
+        with self._lock:
+            self._assets, self._names = assets, names
+            self._stats.update(stats)
+
+    def hashed_name(self, bundle):
+        """Ten co hash cua bundle, None neu pipeline tat."""
+        return self._names.get(bundle)
+
+    def sources(self, bundle):
+        return self.bundles[bundle]
+
+    def get(self, name):
+        return self._assets.get(name)
+
+    def record(self, not_modified):
+        with self._lock:
+            self._stats['not_modified' if not_modified else 'served'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, bundles=len(self._assets))
+
+
+def compress_response(response, accept_encodings, min_size=COMPRESS_MIN_SIZE):
+    """Nen gzip/br body cua response HTML/JSON (khong dung cho response stream)."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    available = ('br', 'gzip') if brotli else ('gzip',)
+    encoding = choose_encoding(accept_encodings, available)
+    if encoding == 'identity':
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    # muc nen vua phai: HTML dong nen moi request
+    compressed = brotli.compress(data, quality=5) if encoding == 'br' else gzip.compress(data, 6)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,35 @@
+# id snowflake gia cho du lieu benchmark; seed.py va fake_discord.py phai sinh ra cung id
+# khoang 9xx... khong trung voi snowflake that (hien tai ~1.3e18) nhung van vua BIGINT
+GUILD_BASE = 900000000000000000
+USER_BASE = 910000000000000000
+ROLE_BASE = 920000000000000000
+CHANNEL_BASE = 930000000000000000
+
+# so member toi da moi guild de id user khong de len guild khac
+MAX_MEMBERS_PER_GUILD = 10_000_000
+
+
+def guild_id(index):
+    return GUILD_BASE + index
+
+
+def guild_index(guild_id_value):
+    """Nguoc lai cua guild_id(); None neu khong phai guild benchmark."""
+    index = int(guild_id_value) - GUILD_BASE
+    return index if 0 <= index < 1000 else None
+
+
+def user_id(guild_index_value, index):
+    return USER_BASE + guild_index_value * MAX_MEMBERS_PER_GUILD + index
+
+
+def role_id(guild_index_value, index):
+    return ROLE_BASE + guild_index_value * 100_000 + index
+
+
+def channel_id(guild_index_value, index):
+    return CHANNEL_BASE + guild_index_value * 100_000 + index
+
+
+def guild_ids(count):
+    return [guild_id(i) for i in range(count)]
@@ -0,0 +1,259 @@
+"""Fake Discord REST API cho benchmark: tra ve guild/channel/role/member/user sinh theo id
+(bench/common.py) voi do tre va ty le 429 tuy chinh.
+
+Chay rieng:  python -m bench.fake_discord --guilds 5 --members 20000 --latency-ms 80 --rate-limit 0.02
+roi dat DISCORD_API_BASE_URL=http://127.0.0.1:5070/api/v10 va IMAGE_ORIGIN_URL=http://127.0.0.1:5070
+(anh avatar/icon) cho dashboard."""
+import argparse
+import itertools
+import random
+import struct
+import threading
+import time
+import zlib
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from bench import common
+
+API_PREFIX = '/api/v10'
+
+
+class _QuietHandler(WSGIRequestHandler):
+    # log moi request lam nhieu ket qua benchmark
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _png(size, rgb):
+    """PNG mot mau kich thuoc size x size (khong can Pillow)."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    raw = (b'\x00' + bytes(rgb) * size) * size
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+class FakeDiscord:
+    def __init__(self, guilds=3, members=5000, roles=60, channels=40,
+                 latency_ms=50.0, jitter_ms=20.0, rate_limit=0.0, retry_after=0.05, seed=1):
+        self.guilds = guilds
+        self.members = members
+        self.roles = roles
+        self.channels = channels
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_limit = rate_limit  # xac suat tra 429 cho moi request
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._role_ids = itertools.count(common.role_id(0, 50_000))
+        self._stats = {'requests': 0, 'rate_limited': 0}
+        self._server = None
+        self.app = self._create_app()
+
+    # --- du lieu sinh theo id ---
+
+    def _guild_index(self, guild_id):
+        index = common.guild_index(guild_id)
+        if index is None or index >= self.guilds:
+            return None
+        return index
+
+    def _user(self, guild_index, index):
+        user_id = common.user_id(guild_index, index)
+        return {
+            'id': str(user_id),
+            'username': f'user{index}',
+            'global_name': f'User {index}' if index % 3 else None,
+            'discriminator': '0',
+            'avatar': f'{user_id:032x}'[-32:] if index % 4 else None,
+            'bot': index % 500 == 0,
+        }
+
+    def _guild(self, guild_index):
+        return {
+            'id': str(common.guild_id(guild_index)),
+            'name': f'Bench Guild {guild_index}',
+            'icon': f'{guild_index:032x}' if guild_index % 2 else None,
+            'owner_id': str(common.user_id(guild_index, 0)),
+            'approximate_member_count': self.members,
+        }
+
+    def _channels(self, guild_index):
+        channels = []
+        for i in range(self.channels):
+            # xen ke category (4), text (0), announcement (5), voice (2), forum (15)
+            kind = (4, 0, 0, 5, 2, 15)[i % 6]
+            channels.append({'id': str(common.channel_id(guild_index, i)), 'type': kind, 'name': f'channel-{i}', 'position': i})
+        return channels
+
+    def _roles(self, guild_index):
+        roles = [{'id': str(common.guild_id(guild_index)), 'name': '@everyone', 'color': 0, 'position': 0}]
+        for i in range(self.roles):
+            roles.append({'id': str(common.role_id(guild_index, i)), 'name': f'Role {i}', 'color': (i * 2654435761) & 0xFFFFFF, 'position': i + 1})
+        return roles
+
+    def _member(self, guild_index, index):
+        return {
+            'user': self._user(guild_index, index),
+            'nick': None,
+            'roles': [str(common.role_id(guild_index, index % self.roles))] if self.roles else [],
+            'joined_at': '2024-01-01T00:00:00+00:00',
+        }
+
+    # --- http ---
+
+    def _create_app(self):
+        app = Flask(__name__)
+
+        @app.before_request
+        def simulate():
+            if request.path == '/_stats':
+                return None
+            with self._lock:
+                self._stats['requests'] += 1
+                delay = self.latency + self._random.uniform(0, self.jitter)
+                limited = request.path.startswith(API_PREFIX) and self._random.random() < self.rate_limit
+                if limited:
+                    self._stats['rate_limited'] += 1
+            time.sleep(delay)
+            if limited:
+                res = jsonify({'message': 'You are being rate limited.', 'retry_after': self.retry_after, 'global': False})
+                res.status_code = 429
+                res.headers['Retry-After'] = str(self.retry_after)
+                res.headers['X-RateLimit-Scope'] = 'user'
+                return res
+            return None
+
+        @app.after_request
+        def rate_limit_headers(response):
+            if response.status_code != 429 and request.path.startswith(API_PREFIX):
+                response.headers['X-RateLimit-Bucket'] = request.url_rule.endpoint if request.url_rule else 'unknown'
+                response.headers['X-RateLimit-Limit'] = '50'
+                response.headers['X-RateLimit-Remaining'] = '49'
+                response.headers['X-RateLimit-Reset-After'] = '1'
+            return response
+
+        def not_found():
+            return jsonify({'message': 'Unknown', 'code': 10000}), 404
+
+        @app.route(f'{API_PREFIX}/guilds/<int:guild_id>')
+        def guild(guild_id):
+            index = self._guild_index(guild_id)
+            return jsonify(self._guild(index)) if index is not None else not_found()
+
+        @app.route(f'{API_PREFIX}/guilds/<int:guild_id>/channels')
+        def channels(guild_id):
+            index = self._guild_index(guild_id)
+            return jsonify(self._channels(index)) if index is not None else not_found()
+
+        @app.route(f'{API_PREFIX}/guilds/<int:guild_id>/roles', methods=['GET', 'POST'])
+        def roles(guild_id):
+            index = self._guild_index(guild_id)
+            if index is None:
+                return not_found()
+            if request.method == 'POST':
+                payload = request.get_json(silent=True) or {}
+                with self._lock:
+                    new_id = next(self._role_ids)
+                return jsonify({'id': str(new_id), 'name': payload.get('name', 'new role'), 'color': payload.get('color', 0), 'position': 1})
+            return jsonify(self._roles(index))
+
+        @app.route(f'{API_PREFIX}/guilds/<int:guild_id>/roles/<int:role_id>', methods=['PATCH', 'DELETE'])
+        def role(guild_id, role_id):
+            if self._guild_index(guild_id) is None:
+                return not_found()
+            if request.method == 'DELETE':
+                return '', 204
+            payload = request.get_json(silent=True) or {}
+            return jsonify({'id': str(role_id), 'name': payload.get('name', 'role'), 'color': payload.get('color', 0), 'position': 1})
+
+        @app.route(f'{API_PREFIX}/guilds/<int:guild_id>/members')
+        def members(guild_id):
+            index = self._guild_index(guild_id)
+            if index is None:
+                return not_found()
+            limit = max(1, min(int(request.args.get('limit', 1)), 1000))
+            after = int(request.args.get('after', 0))
+            start = max(0, after - common.user_id(index, 0) + 1) if after else 0
+            return jsonify([self._member(index, i) for i in range(start, min(start + limit, self.members))])
+
+        @app.route(f'{API_PREFIX}/users/<int:user_id>')
+        def user(user_id):
+            offset = user_id - common.USER_BASE
+            guild_index, index = divmod(offset, common.MAX_MEMBERS_PER_GUILD)
+            if offset < 0 or guild_index >= self.guilds or index >= self.members:
+                return not_found()
+            return jsonify(self._user(guild_index, index))
+
+        # stand-in cho cdn.discordapp.com (IMAGE_ORIGIN_URL), anh mot mau theo hash
+        @app.route('/avatars/<int:owner_id>/<image_hash>.png')
+        @app.route('/icons/<int:owner_id>/<image_hash>.png')
+        @app.route('/embed/avatars/<image_hash>.png')
+        def cdn_image(image_hash, owner_id=0):
+            size = max(16, min(int(request.args.get('size', 128)), 4096))
+            digest = zlib.crc32(f'{owner_id}/{image_hash}'.encode())
+            res = app.response_class(_png(size, (digest & 0xFF, (digest >> 8) & 0xFF, (digest >> 16) & 0xFF)), mimetype='image/png')
+            res.headers['Cache-Control'] = 'public, max-age=31536000'
+            return res
+
+        @app.route('/_stats')
+        def stats():
+            return jsonify(self.stats())
+
+        return app
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self, host='127.0.0.1', port=0):
+        """Chay server trong thread nen, tra ve base url (dung cho DISCORD_API_BASE_URL)."""
+        self._server = make_server(host, port, self.app, threaded=True, request_handler=_QuietHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://{host}:{self._server.server_port}{API_PREFIX}'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+
+def add_arguments(parser):
+    parser.add_argument('--guilds', type=int, default=3, help='so guild benchmark')
+    parser.add_argument('--members', type=int, default=5000, help='so member moi guild')
+    parser.add_argument('--roles', type=int, default=60, help='so role moi guild')
+    parser.add_argument('--channels', type=int, default=40, help='so channel moi guild')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='do tre co dinh cua fake API')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='do tre ngau nhien them vao')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='xac suat tra 429 (0..1)')
+    parser.add_argument('--retry-after', type=float, default=0.05, help='retry_after cua 429 (giay)')
+
+
+def from_args(args):
+    return FakeDiscord(
+        guilds=args.guilds, members=args.members, roles=args.roles, channels=args.channels,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit, retry_after=args.retry_after,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Discord REST API cho benchmark')
+    add_arguments(parser)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5070)
+    args = parser.parse_args()
+    fake = from_args(args)
+    print(f"Fake Discord API: {fake.start(args.host, args.port)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
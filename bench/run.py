@@ -0,0 +1,297 @@
+"""Benchmark tai cho dashboard: chay fake Discord API + dashboard (bench/serve.py) roi goi
+cac route bang nhieu client dong thoi, bao cao p50/p95/p99 va so query Postgres moi request.
+
+    # nap du lieu (mot lan) va chay benchmark
+    python -m bench.run --dsn postgresql://localhost/dashboard_bench --seed --guilds 3 --members 5000 \\
+        --concurrency 8 --requests 2000 --latency-ms 80 --rate-limit 0.02 --json bench-new.json
+
+    # so voi lan chay truoc, exit 1 neu p95 cham hon 20% hoac so query tang
+    python -m bench.run --dsn ... --baseline bench-old.json --max-regression 20
+
+Bien moi truong cua dashboard (CACHE_EVENTS, DB_POOL_SIZE...) duoc truyen nguyen cho
+tien trinh con, nen co the so sanh cau hinh bang cach doi bien moi truong giua hai lan chay.
+Dung --url de do mot dashboard dang chay san (khi do fake API va du lieu do ban tu lo)."""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench import common, fake_discord, seed
+
+# ten -> (rule cua Flask de doc metrics, trong so, ham sinh path)
+SCENARIOS = {
+    'index': ('/', 1, lambda rng, a: '/'),
+    'edit_config': ('/edit/<int:guild_id>', 3, lambda rng, a: f'/edit/{_guild(rng, a)}'),
+    'members': ('/edit/<int:guild_id>/members', 3, lambda rng, a: _members_path(rng, a)),
+    'history': ('/edit/<int:guild_id>/history', 2, lambda rng, a: f'/edit/{_guild(rng, a)}/history'),
+    'edit_member': ('/edit/<int:guild_id>/member/<int:user_id>', 3, lambda rng, a: _member_path(rng, a)),
+    'analytics_api': ('/api/guild/<int:guild_id>/analytics', 1, lambda rng, a: f'/api/guild/{_guild(rng, a)}/analytics?days=30'),
+}
+
+_METRIC_LINE = re.compile(r'^(\w+)\{route="([^"]*)"\} ([0-9.eE+-]+)$')
+
+
+def _guild(rng, args):
+    return common.guild_id(rng.randrange(args.guilds))
+
+
+def _members_path(rng, args):
+    guild_id = _guild(rng, args)
+    if rng.random() < 0.2:
+        return f'/edit/{guild_id}/members?search=user {rng.randrange(100)}'
+    return f'/edit/{guild_id}/members?page={rng.randint(1, max(1, min(args.members // 20, 50)))}'
+
+
+def _member_path(rng, args):
+    index = rng.randrange(args.guilds)
+    return f'/edit/{common.guild_id(index)}/member/{common.user_id(index, rng.randrange(args.members))}'
+
+
+def percentile(sorted_values, p):
+    """Percentile kieu nearest-rank tren list da sap xep."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def scrape_db_queries(base_url):
+    """{route: (tong so query, so request)} tu histogram dashboard_request_db_queries."""
+    res = requests.get(f'{base_url}/metrics', timeout=10)
+    res.raise_for_status()
+    totals = {}
+    for line in res.text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if not match or not match.group(1).startswith('dashboard_request_db_queries_'):
+            continue
+        name, route, value = match.groups()
+        entry = totals.setdefault(route, [0.0, 0.0])
+        if name.endswith('_sum'):
+            entry[0] = float(value)
+        elif name.endswith('_count'):
+            entry[1] = float(value)
+    return totals
+
+
+def start_dashboard(args, discord_url):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': args.dsn,
+        'BOT_TOKEN': env.get('BOT_TOKEN', 'bench-token'),
+        'DISCORD_API_BASE_URL': discord_url,
+        'IMAGE_ORIGIN_URL': discord_url[:-len(fake_discord.API_PREFIX)],
+    })
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = None if args.verbose else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'bench.serve', '--port', str(args.port)],
+        cwd=root, env=env, stdout=output, stderr=output,
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Dashboard thoat voi ma {process.returncode} (chay lai voi --verbose de xem log)')
+        try:
+            if requests.get(f'{base_url}/metrics', timeout=2).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Dashboard khong khoi dong kip')
+
+
+def run_load(base_url, args, scenario_names):
+    """Gui args.requests request chia cho args.concurrency client. Tra ve {scenario: [(giay, status)]}."""
+    rng = random.Random(args.random_seed)
+    weights = [SCENARIOS[name][1] for name in scenario_names]
+    plan = [
+        (name, SCENARIOS[name][2](rng, args))
+        for name in rng.choices(scenario_names, weights=weights, k=args.requests)
+    ]
+    results = {name: [] for name in scenario_names}
+    lock = threading.Lock()
+    position = iter(range(len(plan)))
+    local = threading.local()
+
+    def worker():
+        session = local.__dict__.setdefault('session', requests.Session())
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                return
+            name, path = plan[i]
+            start = time.perf_counter()
+            try:
+                # khong theo redirect: route loi thuong redirect kem flash
+                status = session.get(base_url + path, timeout=args.request_timeout, allow_redirects=False).status_code
+            except requests.RequestException:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                results[name].append((elapsed, status))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(args.concurrency)]:
+            future.result()
+    return results
+
+
+def summarize(results, queries_before, queries_after, wall_seconds):
+    report = {}
+    for name, samples in results.items():
+        if not samples:
+            continue
+        latencies = sorted(seconds for seconds, _ in samples)
+        route = SCENARIOS[name][0]
+        before = queries_before.get(route, (0.0, 0.0))
+        after = queries_after.get(route, (0.0, 0.0))
+        served = after[1] - before[1]
+        report[name] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status != 200),
+            'mean_ms': 1000 * sum(latencies) / len(latencies),
+            'p50_ms': 1000 * percentile(latencies, 50),
+            'p95_ms': 1000 * percentile(latencies, 95),
+            'p99_ms': 1000 * percentile(latencies, 99),
+            'max_ms': 1000 * latencies[-1],
+            'queries_per_request': (after[0] - before[0]) / served if served else None,
+        }
+    total = sum(len(samples) for samples in results.values())
+    return {'scenarios': report, 'requests': total, 'seconds': wall_seconds, 'throughput_rps': total / wall_seconds if wall_seconds else 0}
+
+
+def print_report(summary, discord_stats=None):
+    header = f"{'scenario':<15}{'req':>7}{'err':>6}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'q/req':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, row in summary['scenarios'].items():
+        qpr = row['queries_per_request']
+        print(f"{name:<15}{row['requests']:>7}{row['errors']:>6}"
+              f"{row['mean_ms']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+              f"{(f'{qpr:.2f}' if qpr is not None else '-'):>8}")
+    print(f"\n{summary['requests']} request trong {summary['seconds']:.1f}s ({summary['throughput_rps']:.1f} req/s), thoi gian tinh bang ms")
+    if discord_stats:
+        print(f"Fake Discord API: {discord_stats['requests']} request, {discord_stats['rate_limited']} lan tra 429")
+
+
+def compare(summary, baseline, max_regression):
+    """Tra ve danh sach mo ta regression so voi baseline (p95 va so query moi request)."""
+    problems = []
+    for name, row in summary['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        limit = old['p95_ms'] * (1 + max_regression / 100)
+        if row['p95_ms'] > limit:
+            problems.append(f"{name}: p95 {row['p95_ms']:.1f}ms > {old['p95_ms']:.1f}ms (+{max_regression:g}%)")
+        if row['queries_per_request'] is not None and old.get('queries_per_request') is not None \
+                and row['queries_per_request'] > old['queries_per_request'] + 0.01:
+            problems.append(f"{name}: {row['queries_per_request']:.2f} query/request > {old['queries_per_request']:.2f}")
+        if row['errors'] > old.get('errors', 0):
+            problems.append(f"{name}: {row['errors']} loi > {old.get('errors', 0)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tai cho dashboard')
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='db benchmark, mac dinh: BENCH_DATABASE_URL')
+    parser.add_argument('--url', help='do dashboard dang chay san thay vi tu khoi dong')
+    parser.add_argument('--port', type=int, default=5080, help='cong cho dashboard tu khoi dong')
+    parser.add_argument('--seed', action='store_true', help='nap lai du lieu truoc khi chay')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='danh sach scenario, cach nhau dau phay')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000, help='tong so request (khong tinh warmup)')
+    parser.add_argument('--warmup', type=int, default=50, help='so request lam nong cache truoc khi do')
+    parser.add_argument('--random-seed', type=int, default=42, help='cung seed -> cung chuoi request')
+    parser.add_argument('--request-timeout', type=float, default=60.0)
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--json', help='ghi ket qua ra file JSON')
+    parser.add_argument('--baseline', help='file JSON cua lan chay truoc de so sanh')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='%% p95 duoc phep cham hon baseline')
+    parser.add_argument('--verbose', action='store_true', help='hien log cua dashboard')
+    fake_discord.add_arguments(parser)
+    seed.add_arguments(parser)
+    args = parser.parse_args()
+
+    scenario_names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"scenario khong ton tai: {', '.join(unknown)} (co: {', '.join(SCENARIOS)})")
+    if not args.url and not args.dsn:
+        parser.error('can --dsn (hoac BENCH_DATABASE_URL) hoac --url')
+
+    if args.seed:
+        if not args.dsn:
+            parser.error('--seed can --dsn')
+        print('Dang nap du lieu...')
+        seed.run(args.dsn, args)
+
+    fake = None
+    process = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            fake = fake_discord.from_args(args)
+            process, base_url = start_dashboard(args, fake.start())
+
+        if args.warmup:
+            warmup_args = argparse.Namespace(**{**vars(args), 'requests': args.warmup, 'random_seed': args.random_seed + 1})
+            run_load(base_url, warmup_args, scenario_names)
+
+        discord_before = fake.stats() if fake else None
+        queries_before = scrape_db_queries(base_url)
+        started = time.perf_counter()
+        results = run_load(base_url, args, scenario_names)
+        wall_seconds = time.perf_counter() - started
+        queries_after = scrape_db_queries(base_url)
+        discord_stats = None
+        if fake:
+            discord_after = fake.stats()
+            discord_stats = {key: discord_after[key] - discord_before[key] for key in discord_after}
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        if fake:
+            fake.stop()
+
+    summary = summarize(results, queries_before, queries_after, wall_seconds)
+    summary['config'] = {
+        key: getattr(args, key) for key in (
+            'guilds', 'members', 'transactions', 'concurrency', 'requests', 'latency_ms', 'jitter_ms', 'rate_limit'
+        )
+    }
+    if discord_stats:
+        summary['discord'] = discord_stats
+    print_report(summary, discord_stats)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(summary, json.load(f), args.max_regression)
+        if problems:
+            print('\nREGRESSION:')
+            for problem in problems:
+                print(f'  {problem}')
+            sys.exit(1)
+        print('\nKhong co regression so voi baseline.')
+
+
+if __name__ == '__main__':
+    main()
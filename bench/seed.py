@@ -0,0 +1,240 @@
+"""Nap du lieu benchmark vao Postgres: guild_configs, shop_roles, users, custom_roles, transactions.
+
+Id sinh theo bench/common.py (khop voi fake_discord.py). Chi dung cho db rieng cua
+benchmark: bang duoc tao neu chua co, du lieu cu cua cac guild benchmark bi xoa va nap lai.
+
+    python -m bench.seed --dsn postgresql://localhost/dashboard_bench --guilds 3 --members 5000 --transactions 200000"""
+import argparse
+import io
+import os
+import random
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+from analytics import forget_guild
+from bench import common
+
+# schema toi thieu giong bot (bot tao bang that); migrations cua dashboard chay khi app khoi dong
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS guild_configs (
+    guild_id BIGINT PRIMARY KEY,
+    config_data JSONB
+);
+CREATE TABLE IF NOT EXISTS shop_roles (
+    role_id BIGINT PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    price INTEGER NOT NULL,
+    creator_id BIGINT
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    balance BIGINT NOT NULL DEFAULT 0,
+    fake_boosts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, guild_id)
+);
+CREATE TABLE IF NOT EXISTS custom_roles (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    role_id BIGINT NOT NULL,
+    role_name TEXT,
+    role_color TEXT,
+    role_style TEXT,
+    gradient_color_1 TEXT,
+    gradient_color_2 TEXT,
+    PRIMARY KEY (user_id, guild_id)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    transaction_type TEXT,
+    item_name TEXT,
+    amount_changed BIGINT,
+    new_balance BIGINT,
+    timestamp TIMESTAMP NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_guild_user ON transactions (guild_id, user_id);
+"""
+
+TRANSACTION_TYPES = (
+    ('message_reward', 0.55, 1, 20),
+    ('reaction_reward', 0.2, 1, 5),
+    ('buy_role', 0.1, -5000, -100),
+    ('sell_role', 0.05, 50, 2500),
+    ('create_custom_role', 0.03, -20000, -5000),
+    ('Admin Edit', 0.07, -1000, 1000),
+)
+
+COPY_CHUNK_ROWS = 50_000
+
+
+def guild_config(guild_index, channels):
+    channel_rates = {
+        str(common.channel_id(guild_index, i)): {'MESSAGES_PER_COIN': 5 + i % 10, 'REACTIONS_PER_COIN': 10}
+        for i in range(1, channels, 6)
+    }
+    category_rates = {
+        str(common.channel_id(guild_index, i)): {'MESSAGES_PER_COIN': 8, 'REACTIONS_PER_COIN': 12}
+        for i in range(0, channels, 6)
+    }
+    return {
+        'shop_channel_id': common.channel_id(guild_index, 1),
+        'ADMIN_LOG_CHANNEL_ID': common.channel_id(guild_index, 2),
+        'EMBED_COLOR': '0xffc0cb',
+        'SELL_REFUND_PERCENTAGE': '0.65',
+        'SHOP_DISPLAY_STYLE': 'embed',
+        'MESSAGES': {f'MSG_{i}': f'Noi dung tin nhan {i}' for i in range(40)},
+        'FOOTER_MESSAGES': {f'FOOTER_{i}': f'Footer {i}' for i in range(10)},
+        'CURRENCY_RATES': {
+            'default': {'MESSAGES_PER_COIN': 10, 'REACTIONS_PER_COIN': 20},
+            'categories': category_rates,
+            'channels': channel_rates,
+        },
+        'CUSTOM_ROLE_CONFIG': {'MIN_BOOST_COUNT': 1, 'PRICE': 10000},
+        'BOOSTER_MULTIPLIER_CONFIG': {'ENABLED': True, 'BASE_MULTIPLIER': 1.5, 'PER_BOOST_ADDITION': 0.1},
+        'REGULAR_USER_ROLE_CREATION': {'ENABLED': False, 'PRICE': 50000},
+        'CUSTOM_ROLE_PING_ROLES': [common.role_id(guild_index, 0)],
+        'QNA_DATA': [{'question': f'Cau hoi {i}', 'answer': f'Tra loi {i}'} for i in range(15)],
+    }
+
+
+def _copy(cur, table, columns, rows):
+    """COPY tung khoi COPY_CHUNK_ROWS dong (nhanh hon INSERT nhieu lan khi nap hang trieu dong)."""
+    buffer = io.StringIO()
+    count = 0
+
+    def flush():
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        buffer.write('\t'.join('\\N' if value is None else str(value) for value in row) + '\n')
+        count += 1
+        if count % COPY_CHUNK_ROWS == 0:
+            flush()
+    if buffer.tell():
+        flush()
+    return count
+
+
+def _pick_type(rng):
+    roll = rng.random()
+    for name, weight, low, high in TRANSACTION_TYPES:
+        if roll < weight:
+            return name, low, high
+        roll -= weight
+    name, _, low, high = TRANSACTION_TYPES[0]
+    return name, low, high
+
+
+def _transactions(rng, guild_index, members, count, days, balances):
+    """Sinh giao dich theo thoi gian tang dan; user hoat dong theo phan bo lech (vai user rat nhieu giao dich)."""
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    step = (days * 86400) / max(count, 1)
+    for i in range(count):
+        index = min(int(rng.paretovariate(1.2)) - 1, members - 1)
+        index = (index * 7919) % members  # xao tron de user hoat dong khong don o dau danh sach
+        user_id = common.user_id(guild_index, index)
+        transaction_type, low, high = _pick_type(rng)
+        amount = rng.randint(low, high)
+        balance = max(0, balances[index] + amount)
+        amount = balance - balances[index]
+        balances[index] = balance
+        item_name = f'Role {rng.randrange(20)}' if 'role' in transaction_type else None
+        yield (common.guild_id(guild_index), user_id, transaction_type, item_name, amount, balance,
+               (start + timedelta(seconds=i * step)).isoformat(sep=' '))
+
+
+def reset(cur, guild_count):
+    guild_ids = common.guild_ids(guild_count)
+    for table in ('transactions', 'custom_roles', 'users', 'shop_roles', 'guild_configs'):
+        cur.execute(f"DELETE FROM {table} WHERE guild_id = ANY(%s)", (guild_ids,))
+    # rollup thong ke cua lan nap truoc (neu app da chay migrations)
+    cur.execute("SELECT to_regclass('dashboard_daily_rollups') IS NOT NULL")
+    if cur.fetchone()[0]:
+        for guild_id in guild_ids:
+            forget_guild(cur, guild_id)
+
+
+def seed(conn, guilds=3, members=5000, transactions=100_000, shop_roles=20, custom_roles=50,
+         roles=60, channels=40, days=180, seed_value=1, log=print):
+    rng = random.Random(seed_value)
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+        reset(cur, guilds)
+        for g in range(guilds):
+            guild_id = common.guild_id(g)
+            cur.execute(
+                "INSERT INTO guild_configs (guild_id, config_data) VALUES (%s, %s) "
+                "ON CONFLICT (guild_id) DO UPDATE SET config_data = EXCLUDED.config_data",
+                (guild_id, Json(guild_config(g, channels)))
+            )
+            execute_values(cur, """
+                INSERT INTO shop_roles (role_id, guild_id, price, creator_id) VALUES %s
+                ON CONFLICT (role_id) DO UPDATE SET price = EXCLUDED.price, creator_id = EXCLUDED.creator_id
+            """, [
+                (common.role_id(g, i), guild_id, 1000 * (i + 1), common.user_id(g, i * 37 % members) if i % 3 == 0 else None)
+                for i in range(min(shop_roles, roles))
+            ])
+
+            balances = [0] * members
+            tx_count = _copy(cur, 'transactions',
+                             ('guild_id', 'user_id', 'transaction_type', 'item_name', 'amount_changed', 'new_balance', 'timestamp'),
+                             _transactions(rng, g, members, transactions, days, balances))
+            # so du cuoi cung khop voi lich su giao dich; user chua co giao dich van co dong (balance 0)
+            user_count = _copy(cur, 'users', ('user_id', 'guild_id', 'balance', 'fake_boosts'), (
+                (common.user_id(g, i), guild_id, balances[i], 1 if i % 50 == 0 else 0) for i in range(members)
+            ))
+            execute_values(cur, """
+                INSERT INTO custom_roles (user_id, guild_id, role_id, role_name, role_color, role_style)
+                VALUES %s ON CONFLICT (user_id, guild_id) DO NOTHING
+            """, [
+                (common.user_id(g, i), guild_id, common.role_id(g, (roles - 1 - i) % roles), f'Custom {i}', '#ff99cc', 'solid')
+                for i in range(min(custom_roles, members))
+            ])
+            conn.commit()
+            log(f"Guild {guild_id}: {user_count} users, {tx_count} transactions")
+        cur.execute("ANALYZE guild_configs, shop_roles, users, custom_roles, transactions")
+    conn.commit()
+
+
+def add_arguments(parser):
+    parser.add_argument('--transactions', type=int, default=100_000, help='so giao dich moi guild')
+    parser.add_argument('--shop-roles', type=int, default=20, help='so role trong shop moi guild')
+    parser.add_argument('--custom-roles', type=int, default=50, help='so custom role moi guild')
+    parser.add_argument('--days', type=int, default=180, help='lich su giao dich trai dai bao nhieu ngay')
+    parser.add_argument('--data-seed', type=int, default=1, help='seed ngau nhien (cung seed -> cung du lieu)')
+
+
+def run(dsn, args, log=print):
+    conn = psycopg2.connect(dsn)
+    try:
+        seed(conn, guilds=args.guilds, members=args.members, transactions=args.transactions,
+             shop_roles=args.shop_roles, custom_roles=args.custom_roles, roles=args.roles,
+             channels=args.channels, days=args.days, seed_value=args.data_seed, log=log)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nap du lieu benchmark vao Postgres')
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='mac dinh: BENCH_DATABASE_URL')
+    parser.add_argument('--guilds', type=int, default=3)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--roles', type=int, default=60)
+    parser.add_argument('--channels', type=int, default=40)
+    add_arguments(parser)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('can --dsn hoac BENCH_DATABASE_URL')
+    run(args.dsn, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""Chay dashboard cho benchmark: khong debug, khong reloader (app.py __main__ bat ca hai).
+Cau hinh qua bien moi truong nhu khi chay that (DATABASE_URL, BOT_TOKEN, DISCORD_API_BASE_URL...)."""
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chay dashboard cho benchmark')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5080)
+    args = parser.parse_args()
+
+    from app import app, socketio
+    socketio.run(app, host=args.host, port=args.port, debug=False, use_reloader=False,
+                 log_output=False, allow_unsafe_werkzeug=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import csv
+import io
+import re
+
+MODES = ('add', 'set')
+_ID_SPLIT_RE = re.compile(r'[\s,;]+')
+
+
+class BulkEditError(ValueError):
+    pass
+
+
+def _parse_int(value, field, line):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        where = f"Dòng {line}: " if line else ""
+        raise BulkEditError(f"{where}{field} '{value}' không phải số nguyên.")
+
+
+def parse_user_ids(text, amount, fake_boosts=None):
+    """Danh sach user id (cach nhau boi dau phay/khoang trang/xuong dong) cung mot gia tri."""
+    amount = _parse_int(amount or '', 'amount', 0)
+    fake_boosts = _parse_int(fake_boosts, 'fake_boosts', 0) if fake_boosts else None
+    changes = []
+    for i, token in enumerate(t for t in _ID_SPLIT_RE.split(text or '') if t):
+        changes.append({'user_id': _parse_int(token, 'user_id', i + 1), 'amount': amount, 'fake_boosts': fake_boosts})
+    return changes
+
+
+def parse_csv(text):
+    """CSV cot user_id,amount[,fake_boosts]; dong tieu de (neu co) duoc bo qua."""
+    changes = []
+    for line, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        row = [c.strip() for c in row]
+        if not row or not row[0] or row[0].startswith('#'):
+            continue
+        if line == 1 and not row[0].isdigit():
+            continue
+        if len(row) < 2:
+            raise BulkEditError(f"Dòng {line}: thiếu cột amount.")
+        changes.append({
+            'user_id': _parse_int(row[0], 'user_id', line),
+            'amount': _parse_int(row[1], 'amount', line),
+            'fake_boosts': _parse_int(row[2], 'fake_boosts', line) if len(row) > 2 and row[2] else None,
+        })
+    return changes
+
+
+def parse_json_changes(items):
+    if not isinstance(items, list):
+        raise BulkEditError("'changes' phải là danh sách.")
+    changes = []
+    for i, item in enumerate(items, start=1):
+        if not isinstance(item, dict) or 'user_id' not in item or 'amount' not in item:
+            raise BulkEditError(f"Dòng {i}: cần user_id và amount.")
+        fake_boosts = item.get('fake_boosts')
+        changes.append({
+            'user_id': _parse_int(item['user_id'], 'user_id', i),
+            'amount': _parse_int(item['amount'], 'amount', i),
+            'fake_boosts': _parse_int(fake_boosts, 'fake_boosts', i) if fake_boosts is not None else None,
+        })
+    return changes
+
+
+def validate_changes(changes, max_rows):
+    """Gop cac dong trung user (dong sau thang) va kiem tra gioi han."""
+    merged = {}
+    for change in changes:
+        if change['fake_boosts'] is not None and change['fake_boosts'] < 0:
+            raise BulkEditError(f"fake_boosts của user {change['user_id']} không được âm.")
+        merged[change['user_id']] = change
+    if not merged:
+        raise BulkEditError("Không có thành viên nào để cập nhật.")
+    if len(merged) > max_rows:
+        raise BulkEditError(f"Tối đa {max_rows} thành viên mỗi lần (đang có {len(merged)}).")
+    return list(merged.values())
+
+
+# mot cau lenh: khoa dong cu, cap nhat va ghi transactions cho dong co thay doi so du.
+# du lieu dua vao bang mang (unnest) nen so dong khong lam doi cau lenh
+_BULK_UPDATE_SQL = """
+WITH v AS (
+    SELECT * FROM unnest(%(user_ids)s::bigint[], %(amounts)s::bigint[], %(fake_boosts)s::integer[])
+        AS v(user_id, amount, fake_boosts)
+),
+old AS (
+    SELECT u.user_id, u.balance
+    FROM users u JOIN v ON v.user_id = u.user_id
+    WHERE u.guild_id = %(guild_id)s
+    FOR UPDATE OF u
+),
+upd AS (
+    UPDATE users u
+    SET balance = CASE WHEN %(mode)s = 'set' THEN v.amount ELSE old.balance + v.amount END,
+        fake_boosts = COALESCE(v.fake_boosts, u.fake_boosts)
+    FROM v JOIN old ON old.user_id = v.user_id
+    WHERE u.guild_id = %(guild_id)s AND u.user_id = v.user_id
+    RETURNING u.user_id, old.balance AS old_balance, u.balance AS new_balance
+),
+tx AS (
+    INSERT INTO transactions (guild_id, user_id, transaction_type, item_name, amount_changed, new_balance)
+    SELECT %(guild_id)s, user_id, 'admin_edit', %(note)s, new_balance - old_balance, new_balance
+    FROM upd WHERE new_balance <> old_balance
+)
+SELECT user_id, old_balance, new_balance FROM upd ORDER BY user_id
+"""
+
+
+def apply_bulk_edit(cur, guild_id, changes, mode, note):
+    """Ap dung changes trong transaction hien tai cua cur. Tra ve [(user_id, old_balance, new_balance)].
+    User chua co trong bang users duoc tao voi so du 0 truoc (giong edit_member)."""
+    if mode not in MODES:
+        raise BulkEditError(f"Chế độ '{mode}' không hợp lệ.")
+    user_ids = [c['user_id'] for c in changes]
+    cur.execute(
+        "INSERT INTO users (user_id, guild_id, balance) SELECT user_id, %s, 0 FROM unnest(%s::bigint[]) AS t(user_id) "
+        "ON CONFLICT DO NOTHING",
+        (guild_id, user_ids)
+    )
+    cur.execute(_BULK_UPDATE_SQL, {
+        'guild_id': guild_id,
+        'user_ids': user_ids,
+        'amounts': [c['amount'] for c in changes],
+        'fake_boosts': [c['fake_boosts'] for c in changes],
+        'mode': mode,
+        'note': note,
+    })
+    return cur.fetchall()
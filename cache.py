@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ttl (giay) va so entry toi da cho tung loai du lieu Discord
+DEFAULT_POLICIES = {
+    'guild': (300, 256),
+    'channels': (300, 256),
+    'roles': (300, 256),
+    'user': (3600, 5000),
+}
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _spawn_thread(func, *args):
+    threading.Thread(target=func, args=args, daemon=True).start()
+
+
+class TTLCache:
+    """Cache LRU co ttl cho tung entry. get_or_load gom cac lan miss dong thoi
+    cua cung mot key thanh mot lan goi loader (single-flight).
+
+    Neu co `store` (vd: SQLiteStore) thi moi lan set/xoa duoc ghi ra store, va
+    warm() nap lai entry tu store khi khoi dong. Entry nap tu store duoc dung ngay
+    nhung se duoc tai lai nen o lan get_or_load dau tien."""
+
+    def __init__(self, name, ttl, max_size, store=None, spawn=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.store = store
+        self._spawn = spawn or _spawn_thread
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._revalidate = set()  # key nap tu store, chua duoc tai lai
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'evictions': 0, 'invalidations': 0, 'warmed': 0, 'revalidations': 0}
+
+    def _get_locked(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._data[key]
+            self._revalidate.discard(key)
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._get_locked(key, time.monotonic())
+            self._stats['hits' if found else 'misses'] += 1
+            return value if found else default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def _set_locked(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        self._revalidate.discard(key)
+        if self.store is not None:
+            self.store.put(self.name, key, value)
+        self._evict_locked()
+
+    def _evict_locked(self):
+        while len(self._data) > self.max_size:
+            key, _ = self._data.popitem(last=False)
+            self._revalidate.discard(key)
+            self._stats['evictions'] += 1
+
+    def warm(self, entries):
+        """Nap [(key, value)] tu store, khong ghi de entry dang co."""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in entries:
+                if key not in self._data:
+                    self._data[key] = (expires_at, value)
+                    self._revalidate.add(key)
+                    self._stats['warmed'] += 1
+            self._evict_locked()
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Tra ve gia tri trong cache, neu khong co thi goi loader().
+        Ket qua None khong duoc cache de lan sau thu lai."""
+        with self._lock:
+            found, value = self._get_locked(key, time.monotonic())
+            if found:
+                self._stats['hits'] += 1
+                if key in self._revalidate and key not in self._inflight:
+                    # gia tri tu store co the da cu: tra ve ngay, tai lai nen
+                    self._revalidate.discard(key)
+                    self._stats['revalidations'] += 1
+                    self._spawn(self._revalidate_load, key, self._new_call_locked(key), loader, ttl)
+                return value
+            self._stats['misses'] += 1
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._new_call_locked(key)
+
+        if not owner:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        return self._load(key, call, loader, ttl)
+
+    def _new_call_locked(self, key):
+        call = self._inflight[key] = _InFlight()
+        return call
+
+    def _revalidate_load(self, key, call, loader, ttl):
+        try:
+            self._load(key, call, loader, ttl)
+        except Exception as e:
+            print(f"Loi khi tai lai cache {self.name}:{key}: {e}")
+
+    def _load(self, key, call, loader, ttl):
+        try:
+            call.value = loader()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._stats['loads'] += 1
+                if call.error is None and call.value is not None:
+                    self._set_locked(key, call.value, ttl)
+                self._inflight.pop(key, None)
+            call.event.set()
+        return call.value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._revalidate.discard(key)
+            if self._data.pop(key, None) is not None:
+                self._stats['invalidations'] += 1
+            if self.store is not None:
+                self.store.delete(self.name, key)
+
+    def clear(self):
+        with self._lock:
+            self._stats['invalidations'] += len(self._data)
+            self._data.clear()
+            self._revalidate.clear()
+        if self.store is not None:
+            self.store.clear(self.name)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'size': len(self._data), 'max_size': self.max_size, 'ttl': self.ttl}
+
+
+class EntityCache:
+    """Gom cac TTLCache theo loai entity (guild, channels, roles, user)."""
+
+    def __init__(self, policies=None, store=None):
+        policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.store = store
+        self._caches = {name: TTLCache(name, ttl, size, store=store) for name, (ttl, size) in policies.items()}
+
+    def warm(self, max_age):
+        """Nap snapshot con moi hon max_age giay tu store (neu co)."""
+        if self.store is None:
+            return
+        self.store.prune(max_age)
+        for name, cache in self._caches.items():
+            cache.warm(self.store.load(name, max_age, cache.max_size))
+
+    def __getitem__(self, entity):
+        return self._caches[entity]
+
+    def invalidate(self, entity, key):
+        self._caches[entity].invalidate(str(key))
+
+    def invalidate_guild(self, guild_id):
+        key = str(guild_id)
+        for entity in ('guild', 'channels', 'roles'):
+            self._caches[entity].invalidate(key)
+
+    def stats(self):
+        return {name: cache.stats() for name, cache in self._caches.items()}
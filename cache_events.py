@@ -0,0 +1,86 @@
+import json
+import select
+import threading
+
+import psycopg2
+from psycopg2 import sql
+
+
+class CacheEvents:
+    """Nhan su kien thay doi (tu bot qua Socket.IO hoac tu trigger Postgres) va
+    goi handler da dang ky theo `type` de cap nhat cache ngay, ttl chi con la du phong.
+
+    Moi su kien la dict co `type` va thuong co `guild_id`, vd:
+        {"type": "member_upsert", "guild_id": "1", "member": {"user": {...}}}
+        {"type": "role_remove", "guild_id": "1", "role_id": "2"}"""
+
+    def __init__(self):
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._stats = {'applied': 0, 'ignored': 0, 'errors': 0}
+
+    def on(self, event_type, handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def apply(self, event):
+        """Ap dung mot su kien, tra ve True neu co handler xu ly."""
+        handlers = self._handlers.get(event.get('type')) if isinstance(event, dict) else None
+        if not handlers:
+            with self._lock:
+                self._stats['ignored'] += 1
+            return False
+        ok = True
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                ok = False
+                print(f"Loi khi ap dung su kien cache {event.get('type')}: {e}")
+        with self._lock:
+            self._stats['applied' if ok else 'errors'] += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+class PostgresListener:
+    """LISTEN mot channel Postgres tren ket noi rieng va chuyen payload JSON cho handler.
+    Tu ket noi lai khi mat ket noi."""
+
+    def __init__(self, dsn, channel, handler, spawn, sleep, wait=None, poll_timeout=5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.handler = handler
+        self._spawn = spawn
+        self._sleep = sleep
+        self._wait = wait or select.select
+        self.poll_timeout = poll_timeout
+
+    def start(self):
+        self._spawn(self._run)
+
+    def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                while True:
+                    self._wait([conn], [], [], self.poll_timeout)
+                    conn.poll()
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        try:
+                            self.handler(json.loads(payload))
+                        except ValueError:
+                            print(f"Payload NOTIFY khong hop le tren {self.channel}: {payload[:200]}")
+            except psycopg2.Error as e:
+                print(f"Mat ket noi LISTEN {self.channel}, thu lai sau: {e}")
+                self._sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """Luu snapshot cua cache ra file SQLite de worker moi khoi dong co du lieu ngay.
+
+    Ghi/xoa duoc gom lai va ghi tren thread rieng moi `flush_interval` giay nen
+    request khong phai doi disk. Nhieu worker co the dung chung mot file (WAL)."""
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}  # (entity, key) -> gia tri can ghi, None la xoa
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {'writes': 0, 'deletes': 0, 'loaded': 0, 'errors': 0}
+        try:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    "entity TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                    "PRIMARY KEY (entity, key))"
+                )
+        except sqlite3.Error as e:
+            print(f"Khong the mo cache SQLite {path}: {e}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:  # commit/rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def put(self, entity, key, value):
+        # gia tri cache khong bi sua sau khi set nen co the serialize luc flush
+        with self._lock:
+            self._pending[(entity, key)] = value
+        self._ensure_started()
+
+    def delete(self, entity, key):
+        with self._lock:
+            self._pending[(entity, key)] = None
+        self._ensure_started()
+
+    def clear(self, entity):
+        with self._lock:
+            self._pending = {k: v for k, v in self._pending.items() if k[0] != entity}
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE entity = ?", (entity,))
+        except sqlite3.Error as e:
+            print(f"Loi khi xoa cache SQLite {entity}: {e}")
+
+    def load(self, entity, max_age, limit):
+        """Tra ve [(key, value)] con moi hon max_age giay, entry cu nhat dung truoc."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, value FROM cache_entries WHERE entity = ? AND stored_at >= ? "
+                    "ORDER BY stored_at DESC LIMIT ?",
+                    (entity, time.time() - max_age, limit)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Loi khi doc cache SQLite {entity}: {e}")
+            return []
+        entries = []
+        for key, value in reversed(rows):
+            try:
+                entries.append((key, json.loads(value)))
+            except ValueError:
+                continue
+        with self._lock:
+            self._stats['loaded'] += len(entries)
+        return entries
+
+    def prune(self, max_age):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE stored_at < ?", (time.time() - max_age,))
+        except sqlite3.Error as e:
+            print(f"Loi khi don cache SQLite: {e}")
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        now = time.time()
+        writes = []
+        deletes = []
+        for (entity, key), value in pending.items():
+            if value is None:
+                deletes.append((entity, key))
+            else:
+                try:
+                    writes.append((entity, key, json.dumps(value), now))
+                except (TypeError, ValueError):
+                    continue
+        try:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO cache_entries (entity, key, value, stored_at) VALUES (?, ?, ?, ?)", writes)
+                conn.executemany("DELETE FROM cache_entries WHERE entity = ? AND key = ?", deletes)
+        except sqlite3.Error as e:
+            print(f"Loi khi ghi cache SQLite: {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+            return
+        with self._lock:
+            self._stats['writes'] += len(writes)
+            self._stats['deletes'] += len(deletes)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending)}
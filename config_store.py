@@ -0,0 +1,119 @@
+import copy
+
+from psycopg2.extras import Json, RealDictCursor
+
+# cac key luon co trong config dua cho template (ban db co the thieu)
+CONFIG_DEFAULTS = {
+    "MESSAGES": {}, "FOOTER_MESSAGES": {},
+    "CURRENCY_RATES": {"default": {}, "categories": {}, "channels": {}},
+    "CUSTOM_ROLE_CONFIG": {}, "QNA_DATA": [],
+    "BOOSTER_MULTIPLIER_CONFIG": {},
+    "REGULAR_USER_ROLE_CREATION": {},
+    "CUSTOM_ROLE_PING_ROLES": []
+}
+
+
+class StaleConfigError(Exception):
+    """Config da bi nguoi khac (hoac bot) sua sau khi form duoc mo."""
+
+    def __init__(self, guild_id, expected_version):
+        super().__init__(f"Config cua guild {guild_id} khong con o version {expected_version}")
+        self.guild_id = guild_id
+        self.expected_version = expected_version
+
+
+class ConfigEntry:
+    __slots__ = ('version', 'config')
+
+    def __init__(self, version, raw):
+        self.version = version
+        self.config = normalize_config(raw)  # da them key mac dinh, chi doc
+
+    @property
+    def etag(self):
+        return f"cfg-{self.version}"
+
+
+def normalize_config(raw):
+    config = copy.deepcopy(raw)
+    for key, default_value in CONFIG_DEFAULTS.items():
+        if key not in config:
+            config[key] = copy.deepcopy(default_value)
+    return config
+
+
+def diff_config(old, new, max_depth=2, path=()):
+    """So sanh hai config, tra ve (sets, deletes): sets la [(path, value)], deletes la [path].
+    Chi di sau toi `max_depth` cap; list va gia tri le duoc ghi ca khoi."""
+    sets, deletes = [], []
+    for key in old:
+        if key not in new:
+            deletes.append(path + (key,))
+    for key, value in new.items():
+        if key not in old:
+            sets.append((path + (key,), value))
+        elif old[key] != value:
+            if isinstance(old[key], dict) and isinstance(value, dict) and len(path) + 1 < max_depth:
+                sub_sets, sub_deletes = diff_config(old[key], value, max_depth, path + (key,))
+                sets.extend(sub_sets)
+                deletes.extend(sub_deletes)
+            else:
+                sets.append((path + (key,), value))
+    return sets, deletes
+
+
+class ConfigStore:
+    """Doc/ghi config_data cua guild_configs theo version.
+
+    config_version tang moi khi config_data doi (trigger trong migrations, ap dung
+    ca cho thay doi tu bot). Ban da doc duoc cache trong `cache` (TTLCache) va xoa
+    khi co su kien 'config' hoac khi dashboard ghi."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _load(self, conn, guild_id):
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT config_data, config_version FROM guild_configs WHERE guild_id = %s;", (guild_id,))
+            row = cur.fetchone()
+        conn.commit()
+        if not row:
+            return None
+        return ConfigEntry(row['config_version'], row['config_data'] or {})
+
+    def get(self, conn, guild_id):
+        """Tra ve ConfigEntry cua guild hoac None neu guild chua co config."""
+        return self.cache.get_or_load(str(guild_id), lambda: self._load(conn, guild_id))
+
+    def invalidate(self, guild_id):
+        self.cache.invalidate(str(guild_id))
+
+    def save(self, cur, guild_id, expected_version, new_config):
+        """Ghi phan thay doi so voi ban `expected_version` trong transaction hien tai cua cur.
+        Raise StaleConfigError neu version trong db da khac. Tra ve version moi.
+        Nguoi goi commit roi moi goi invalidate()."""
+        cur.execute(
+            "SELECT config_data, config_version FROM guild_configs WHERE guild_id = %s FOR UPDATE",
+            (guild_id,)
+        )
+        row = cur.fetchone()
+        if not row or row[1] != expected_version:
+            raise StaleConfigError(guild_id, expected_version)
+
+        sets, deletes = diff_config(row[0] or {}, new_config)
+        if not sets and not deletes:
+            return expected_version
+
+        expr = "COALESCE(config_data, '{}'::jsonb)"
+        params = []
+        for path in deletes:
+            expr = f"({expr} #- %s)"
+            params.append(list(path))
+        for path, value in sets:
+            expr = f"jsonb_set({expr}, %s, %s)"
+            params.extend([list(path), Json(value)])
+        cur.execute(
+            f"UPDATE guild_configs SET config_data = {expr} WHERE guild_id = %s RETURNING config_version",
+            params + [guild_id]
+        )
+        return cur.fetchone()[0]
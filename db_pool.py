@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Pool ket noi psycopg2 gioi han kich thuoc.
+
+    acquire() cho toi da `timeout` giay khi pool da het ket noi. Dung threading nen
+    khi chay eventlet can monkey-patch truoc khi import de cho doi khong chan hub.
+    Pool tu reset sau khi process bi fork (gunicorn preload) de khong dung chung socket."""
+
+    def __init__(self, dsn, max_size=10, timeout=10.0, health_check_after=30.0, connect=None):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._connect = connect or psycopg2.connect
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, thoi diem tra ve pool)
+        self._size = 0
+        self._pid = os.getpid()
+        self._stats = {
+            'acquired': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+        }
+
+    def _check_fork(self):
+        # goi khi dang giu self._cond
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._size = 0
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._cond:
+                self._check_fork()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"Het ket noi trong pool sau {self.timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self._size += 1
+                self._stats['acquired'] += 1
+                if waited:
+                    self._stats['waits'] += 1
+                    self._stats['wait_seconds'] += time.monotonic() - start
+
+            if conn is None:
+                try:
+                    conn = self._connect(self.dsn)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                return conn
+            if self._is_healthy(conn, idle_since):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        if conn.closed:
+            self._discard(conn)
+            return
+        try:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except psycopg2.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
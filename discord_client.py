@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = "https://discord.com/api/v10"
+
+# id cua major param (guild/channel/webhook) duoc giu lai trong route key,
+# cac id khac thay bang {id} de cac request cung route dung chung bucket
+_MAJOR_PARAM_RE = re.compile(r'^/(guilds|channels|webhooks)/(\d+)')
+_SNOWFLAKE_RE = re.compile(r'/\d{5,}')
+
+
+class _Bucket:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = 0.0
+
+
+class DiscordClient:
+    """Client REST dung chung: giu ket noi keep-alive, theo doi rate limit
+    theo bucket va global, tu retry khi gap 429."""
+
+    def __init__(self, token, base_url=API_BASE_URL, timeout=(5, 15), max_retries=3, pool_size=20):
+        self.token = token
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._global_reset_at = 0.0
+        self._route_to_bucket = {}  # route key -> bucket hash tu header
+        self._buckets = {}
+
+        # observer(method, status, seconds): goi sau moi request (tinh ca thoi gian cho rate limit)
+        self.observer = None
+
+        self._stats = {
+            'calls': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'errors': 0,
+            'wait_seconds': 0.0,
+        }
+
+    @staticmethod
+    def route_key(method, endpoint):
+        path = endpoint.split('?', 1)[0]
+        major = _MAJOR_PARAM_RE.match(path)
+        if major:
+            rest = _SNOWFLAKE_RE.sub('/{id}', path[major.end():])
+            path = major.group(0) + rest
+        else:
+            path = _SNOWFLAKE_RE.sub('/{id}', path)
+        return f"{method} {path}"
+
+    def _bucket_for(self, route):
+        with self._lock:
+            bucket_id = self._route_to_bucket.get(route, route)
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                bucket = self._buckets[bucket_id] = _Bucket()
+            return bucket
+
+    def _sleep(self, seconds):
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        with self._lock:
+            self._stats['wait_seconds'] += seconds
+
+    def _wait_for_slot(self, bucket):
+        # goi khi dang giu bucket.lock: het luot thi cac request khac cung bucket xep hang sau
+        self._sleep(self._global_reset_at - time.monotonic())
+        now = time.monotonic()
+        if bucket.remaining is not None and bucket.remaining <= 0 and bucket.reset_at > now:
+            self._sleep(bucket.reset_at - now)
+            bucket.remaining = None
+        if bucket.remaining is not None:
+            bucket.remaining -= 1
+
+    def _update_limits(self, route, bucket, res):
+        headers = res.headers
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+        major = _MAJOR_PARAM_RE.match(route.split(' ', 1)[1])
+        if bucket_hash:
+            bucket_id = f"{bucket_hash}:{major.group(0) if major else ''}"
+            with self._lock:
+                if self._route_to_bucket.get(route) != bucket_id:
+                    self._route_to_bucket[route] = bucket_id
+                    self._buckets.setdefault(bucket_id, bucket)
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is not None:
+            remaining = int(remaining)
+            # trong cung cua so reset, header co the chua tinh cac request dang chay song song
+            if bucket.remaining is None or time.monotonic() >= bucket.reset_at:
+                bucket.remaining = remaining
+            else:
+                bucket.remaining = min(bucket.remaining, remaining)
+        if reset_after is not None:
+            bucket.reset_at = time.monotonic() + float(reset_after)
+
+    def _handle_429(self, bucket, res):
+        try:
+            body = res.json()
+        except ValueError:
+            body = {}
+        retry_after = float(body.get('retry_after') or res.headers.get('Retry-After') or 1)
+        is_global = body.get('global') or res.headers.get('X-RateLimit-Global') or res.headers.get('X-RateLimit-Scope') == 'global'
+        with self._lock:
+            self._stats['rate_limited'] += 1
+            if is_global:
+                self._global_reset_at = max(self._global_reset_at, time.monotonic() + retry_after)
+        if not is_global:
+            bucket.remaining = 0
+            bucket.reset_at = time.monotonic() + retry_after
+
+    def request(self, method, endpoint, payload=None, reason=None):
+        """Gui request, tra ve requests.Response (co the van la 429 neu het luot retry).
+        Loi mang se raise requests.RequestException."""
+        start = time.perf_counter()
+        status = 0
+        try:
+            res = self._request(method, endpoint, payload, reason)
+            status = res.status_code
+            return res
+        finally:
+            if self.observer:
+                self.observer(method, status, time.perf_counter() - start)
+
+    def _request(self, method, endpoint, payload, reason):
+        headers = {"Authorization": f"Bot {self.token}"}
+        if reason:
+            headers['X-Audit-Log-Reason'] = requests.utils.quote(reason)
+        route = self.route_key(method, endpoint)
+
+        attempt = 0
+        while True:
+            bucket = self._bucket_for(route)
+            # chi giu bucket.lock khi cho va nhan luot; request HTTP chay song song
+            with bucket.lock:
+                self._wait_for_slot(bucket)
+            with self._lock:
+                self._stats['calls'] += 1
+            try:
+                res = self.session.request(
+                    method, f"{self.base_url}{endpoint}",
+                    headers=headers, json=payload, timeout=self.timeout
+                )
+            except requests.RequestException:
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            with bucket.lock:
+                self._update_limits(route, bucket, res)
+                if res.status_code == 429:
+                    self._handle_429(bucket, res)
+
+            if res.status_code != 429 or attempt >= self.max_retries:
+                if res.status_code >= 400:
+                    with self._lock:
+                        self._stats['errors'] += 1
+                return res
+            attempt += 1
+            with self._lock:
+                self._stats['retries'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
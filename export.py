@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+EXPORT_COLUMNS = ('id', 'timestamp', 'user_id', 'transaction_type', 'item_name', 'amount_changed', 'new_balance')
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ExportError(f"{field} phải có dạng YYYY-MM-DD.")
+
+
+def build_filters(guild_id, args):
+    """Doc bo loc tu query string (user_id, type, start, end). Tra ve (dieu kien WHERE, params).
+    start/end tinh theo ngay, end duoc tinh ca ngay do."""
+    clauses = ["guild_id = %s"]
+    params = [guild_id]
+    user_id = (args.get('user_id') or '').strip()
+    if user_id:
+        if not user_id.isdigit():
+            raise ExportError("user_id phải là số.")
+        clauses.append("user_id = %s")
+        params.append(int(user_id))
+    transaction_type = (args.get('type') or '').strip()
+    if transaction_type:
+        clauses.append("transaction_type = %s")
+        params.append(transaction_type)
+    start = (args.get('start') or '').strip()
+    if start:
+        clauses.append("timestamp >= %s")
+        params.append(_parse_date(start, 'start'))
+    end = (args.get('end') or '').strip()
+    if end:
+        clauses.append("timestamp < %s")
+        params.append(_parse_date(end, 'end') + timedelta(days=1))
+    return " AND ".join(clauses), params
+
+
+def _csv_chunk(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+    return buffer.getvalue()
+
+
+def _json_chunk(rows, first):
+    parts = []
+    for row in rows:
+        item = dict(zip(EXPORT_COLUMNS, row))
+        item['timestamp'] = item['timestamp'].isoformat() if item['timestamp'] else None
+        # id dang chuoi vi snowflake vuot qua do chinh xac so cua JavaScript
+        item['user_id'] = str(item['user_id'])
+        parts.append(("" if first else ",\n") + json.dumps(item, ensure_ascii=False))
+        first = False
+    return "".join(parts)
+
+
+def stream_transactions(conn, where, params, fmt, batch_size=2000):
+    """Generator tra ve tung khoi text cua file export.
+
+    Doc bang named cursor (server-side) theo tung `batch_size` dong nen bo nho
+    khong phu thuoc so dong. Nguoi goi giu `conn` cho toi khi response dong."""
+    if fmt == 'csv':
+        yield _csv_chunk((), header=True)
+    else:
+        yield "[\n"
+    first = True
+    try:
+        with conn.cursor(name='transactions_export') as cur:
+            cur.execute(
+                f"SELECT {', '.join(EXPORT_COLUMNS)} FROM transactions WHERE {where} ORDER BY timestamp, id",
+                params
+            )
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                if fmt == 'csv':
+                    yield _csv_chunk(rows)
+                else:
+                    yield _json_chunk(rows, first)
+                first = False
+        conn.commit()
+    except Exception as e:
+        # header da gui nen khong doi duoc status code, chi ghi log va dung file
+        print(f"Loi khi export giao dich: {e}")
+        conn.rollback()
+        return
+    if fmt == 'json':
+        yield "\n]\n"
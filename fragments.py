@@ -0,0 +1,72 @@
+import hashlib
+
+from markupsafe import Markup, escape
+
+# loai channel Discord dung trong form config
+TEXT_CHANNEL_TYPES = (0,)
+CATEGORY_CHANNEL_TYPES = (4,)
+RATEABLE_CHANNEL_TYPES = (0, 5, 15)
+
+
+class OptionList:
+    """Danh sach <option> da render san. Chon/loc option bang thao tac chuoi khi dung,
+    khong lap lai vong for trong template cho moi dong."""
+    __slots__ = ('_options', '_html')
+
+    def __init__(self, items):
+        # items: [(value, label)]
+        self._options = [
+            (str(value), f'<option value="{escape(str(value))}">{escape(label)}</option>')
+            for value, label in items
+        ]
+        self._html = ''.join(option for _, option in self._options)
+
+    def __html__(self):
+        return self._html
+
+    def __len__(self):
+        return len(self._options)
+
+    def selected(self, value):
+        """Toan bo option, option co value trung `value` duoc chon."""
+        if value is None or value == '':
+            return Markup(self._html)
+        start = f'<option value="{escape(str(value))}">'
+        return Markup(self._html.replace(start, start[:-1] + ' selected>', 1))
+
+    def only(self, values):
+        values = {str(v) for v in values}
+        return Markup(''.join(option for value, option in self._options if value in values))
+
+    def excluding(self, values):
+        values = {str(v) for v in values}
+        return Markup(''.join(option for value, option in self._options if value not in values))
+
+
+class GuildFragments:
+    """Cac danh sach option cua trang edit_config cho mot guild, dung chung giua cac dong va request."""
+    __slots__ = ('text_channels', 'category_channels', 'rateable_channels', 'roles', 'pingable_roles')
+
+    def __init__(self, channels, roles):
+        channels = channels or []
+        roles = roles or []
+        self.text_channels = OptionList(
+            (ch['id'], f"#{ch['name']}") for ch in channels if ch['type'] in TEXT_CHANNEL_TYPES)
+        self.category_channels = OptionList(
+            (ch['id'], ch['name']) for ch in channels if ch['type'] in CATEGORY_CHANNEL_TYPES)
+        self.rateable_channels = OptionList(
+            (ch['id'], f"#{ch['name']}") for ch in channels if ch['type'] in RATEABLE_CHANNEL_TYPES)
+        self.roles = OptionList((r['id'], r['name']) for r in roles)
+        # role co the chon de ping: bo role cua bot/integration va @everyone
+        self.pingable_roles = OptionList(
+            (r['id'], r['name']) for r in roles if not r.get('managed') and r['name'] != '@everyone')
+
+
+def fragments_key(guild_id, channels, roles):
+    """Key cache: guild + hash cac truong cua channel/role co trong HTML."""
+    digest = hashlib.blake2b(digest_size=16)
+    for ch in channels or ():
+        digest.update(f"c{ch['id']}\x1f{ch['type']}\x1f{ch.get('name')}\x1e".encode())
+    for r in roles or ():
+        digest.update(f"r{r['id']}\x1f{r.get('name')}\x1f{bool(r.get('managed'))}\x1e".encode())
+    return f"{guild_id}:{digest.hexdigest()}"
@@ -0,0 +1,72 @@
+# che do I/O cua process: 'eventlet' (mot OS thread, moi request la mot green thread)
+# hoac 'threading' (moi request mot OS thread). Phai chon truoc khi import requests/psycopg2.
+ASYNC_MODES = ('eventlet', 'threading')
+
+
+def choose_mode(requested=None):
+    """ASYNC_MODE hop le; bo trong thi dung eventlet neu da cai (giong Flask-SocketIO)."""
+    requested = (requested or '').strip().lower()
+    if requested:
+        if requested not in ASYNC_MODES:
+            raise ValueError(f"ASYNC_MODE khong hop le: {requested} (chon {', '.join(ASYNC_MODES)})")
+        return requested
+    try:
+        import eventlet  # noqa: F401
+    except ImportError:
+        return 'threading'
+    return 'eventlet'
+
+
+def setup(mode):
+    """Chuan bi I/O cho `mode`. Voi eventlet: monkey-patch socket/select/threading/time
+    (requests, pool ket noi, fan_out thanh green) va cho psycopg2 doi ket qua qua hub."""
+    if mode != 'eventlet':
+        return mode
+    import eventlet
+    eventlet.monkey_patch()
+    from psycopg2 import extensions
+    extensions.set_wait_callback(eventlet_wait_callback)
+    return mode
+
+
+def eventlet_wait_callback(conn):
+    """Wait callback cua psycopg2: nhuong hub trong khi cho socket Postgres thay vi chan ca process.
+
+    libpq khong ap dung connect_timeout cho ket noi async, nen callback tu dat timeout
+    (doc tu dsn) khi ket noi con dang thiet lap."""
+    from eventlet.hubs import trampoline
+    from psycopg2 import OperationalError, extensions
+
+    timeout = None
+    if conn.status == extensions.STATUS_SETUP:
+        connect_timeout = extensions.parse_dsn(conn.dsn).get('connect_timeout')
+        timeout = float(connect_timeout) if connect_timeout and float(connect_timeout) > 0 else None
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True, timeout=timeout, timeout_exc=OperationalError("timeout expired"))
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True, timeout=timeout, timeout_exc=OperationalError("timeout expired"))
+        else:
+            raise OperationalError(f"Ket qua poll() khong hop le: {state}")
+
+
+def check(mode, server_mode):
+    """Danh sach ly do I/O se chan hub (rong neu on). `server_mode` la async_mode thuc te cua Socket.IO."""
+    if server_mode != mode:
+        return [f"Socket.IO dang chay async_mode={server_mode} nhung I/O duoc chuan bi cho {mode}"]
+    if mode != 'eventlet':
+        return []
+    from eventlet import patcher
+    from psycopg2 import extensions
+
+    problems = [
+        f"module {name} chua duoc eventlet monkey-patch"
+        for name in ('socket', 'select', 'thread', 'time')
+        if not patcher.is_monkey_patched(name)
+    ]
+    if extensions.get_wait_callback() is None:
+        problems.append("psycopg2 chua co wait callback (query se chan hub)")
+    return problems
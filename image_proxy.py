@@ -0,0 +1,194 @@
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CDN_BASE_URL = "https://cdn.discordapp.com"
+# kich thuoc thumbnail (px); yeu cau duoc lam tron len bucket gan nhat
+SIZE_BUCKETS = (32, 64, 128, 256)
+CONTENT_TYPES = {'png': 'image/png', 'webp': 'image/webp'}
+
+# chi proxy anh avatar/icon cua CDN Discord (khong nhan URL tuy y)
+_PATH_RE = re.compile(r'^(?:(?:avatars|icons)/\d+/(?:a_)?[0-9a-f]{32}|embed/avatars/\d)\.png$')
+
+
+def size_bucket(size):
+    for bucket in SIZE_BUCKETS:
+        if size <= bucket:
+            return bucket
+    return SIZE_BUCKETS[-1]
+
+
+def proxy_path(url):
+    """Path CDN cua url avatar/icon (vd 'avatars/1/abc.png'), None neu khong proxy duoc."""
+    prefix = CDN_BASE_URL + '/'
+    if not url or not url.startswith(prefix):
+        return None
+    path = url[len(prefix):].split('?', 1)[0]
+    return path if _PATH_RE.match(path) else None
+
+
+def valid_path(path):
+    return bool(_PATH_RE.match(path))
+
+
+class CdnFetcher:
+    """Lay anh goc tu CDN Discord. base_url co the tro toi stand-in (bench/fake_discord.py)."""
+
+    def __init__(self, base_url=CDN_BASE_URL, timeout=(3, 10)):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def __call__(self, path, size):
+        """Bytes PNG cua anh o kich thuoc `size`, None neu anh khong ton tai.
+        Loi mang/HTTP khac raise requests.RequestException."""
+        res = self._session.get(f"{self.base_url}/{path}", params={'size': size}, timeout=self.timeout)
+        if res.status_code == 404:
+            return None
+        res.raise_for_status()
+        return res.content
+
+
+class ThumbnailCache:
+    """File thumbnail tren dia, tong dung luong toi da `max_bytes`; day thi xoa file lau khong dung nhat.
+    Danh sach file duoc doc lai khi khoi dong (theo mtime) nen cache giu qua cac lan chay."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()  # ten file -> so byte, cu nhat o dau
+        self._total = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._total += size
+        self._evict_locked()
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._files:
+                self._stats['misses'] += 1
+                return None
+            self._files.move_to_end(name)
+            self._stats['hits'] += 1
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # giu thu tu LRU sau khi khoi dong lai
+        except OSError:
+            with self._lock:
+                self._total -= self._files.pop(name, 0)
+            return None
+        return data
+
+    def put(self, name, data):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Loi khi ghi thumbnail {name}: {e}")
+            return
+        with self._lock:
+            self._total += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            self._stats['writes'] += 1
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self._total -= size
+            self._stats['evictions'] += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, files=len(self._files), bytes=self._total)
+
+
+class ImageProxy:
+    """Thumbnail avatar/icon theo bucket kich thuoc.
+
+    Co Pillow: lay anh goc mot lan o bucket lon nhat (luu vao cache), thu nho va ma hoa
+    WebP/PNG tai cho cho tung bucket. Khong co Pillow: lay PNG da thu nho tu CDN (?size=)
+    cho tung bucket, chi co dinh dang PNG."""
+
+    def __init__(self, cache, fetch):
+        self.cache = cache
+        self.fetch = fetch  # fetch(path, size) -> bytes | None
+        # khoa theo nhom key: request trung anh cho nhau thay vi cung goi CDN
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    @property
+    def formats(self):
+        return ('webp', 'png') if Image else ('png',)
+
+    def choose_format(self, accept_mimetypes):
+        if 'webp' in self.formats and accept_mimetypes['image/webp']:
+            return 'webp'
+        return 'png'
+
+    @staticmethod
+    def _key(path):
+        return hashlib.sha256(path.encode()).hexdigest()[:32]
+
+    def thumbnail(self, path, size, fmt):
+        """(bytes, ten file dung lam ETag) hoac None neu anh goc khong ton tai."""
+        key = self._key(path)
+        name = f"{key}-{size}.{fmt}"
+        data = self.cache.get(name)
+        if data is not None:
+            return data, name
+        with self._locks[int(key[:8], 16) % len(self._locks)]:
+            data = self.cache.get(name)
+            if data is None:
+                data = self._render(path, key, size, fmt)
+                if data is None:
+                    return None
+                self.cache.put(name, data)
+        return data, name
+
+    def _render(self, path, key, size, fmt):
+        if not Image:
+            return self.fetch(path, size)
+        original_name = f"{key}-orig.png"
+        original = self.cache.get(original_name)
+        if original is None:
+            original = self.fetch(path, SIZE_BUCKETS[-1])
+            if original is None:
+                return None
+            self.cache.put(original_name, original)
+        with Image.open(io.BytesIO(original)) as image:
+            image = image.convert('RGBA')
+            if image.width > size or image.height > size:
+                image.thumbnail((size, size), Image.LANCZOS)
+            out = io.BytesIO()
+            if fmt == 'webp':
+                image.save(out, 'WEBP', quality=85, method=4)
+            else:
+                image.save(out, 'PNG', optimize=True)
+        return out.getvalue()
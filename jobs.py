@@ -0,0 +1,121 @@
+import threading
+
+from psycopg2.extras import Json, RealDictCursor
+
+# job "running" khong cap nhat qua khoang nay duoc coi la bi bo do (worker chet/restart)
+STALE_AFTER = "2 minutes"
+
+
+class JobRunner:
+    """Hang doi job luu trong bang dashboard_jobs (tao trong migrations.py).
+
+    Moi job la danh sach item, xu ly theo tung lo `concurrency` item song song.
+    Sau moi lo tien do duoc ghi vao db va bao qua notify(), nen job dang chay do
+    se duoc worker khac (hoac process sau khi restart) nhan lai va chay tiep."""
+
+    def __init__(self, connection, fan_out, notify=None, concurrency=4, poll_interval=30.0):
+        self.connection = connection
+        self.fan_out = fan_out
+        self.notify = notify or (lambda event, data: None)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._handlers = {}
+        self._wakeup = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def register(self, kind, handler, on_finish=None):
+        """handler(guild_id, item) tra ve True neu thanh cong.
+        on_finish(guild_id, job) goi khi job ket thuc."""
+        self._handlers[kind] = (handler, on_finish)
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, guild_id, kind, items):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO dashboard_jobs (guild_id, kind, items) VALUES (%s, %s, %s) RETURNING id",
+                    (guild_id, kind, Json(list(items)))
+                )
+                job_id = cur.fetchone()[0]
+            conn.commit()
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def _loop(self):
+        while True:
+            try:
+                while self._run_next():
+                    pass
+            except Exception as e:
+                print(f"Loi trong job runner: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self):
+        with self.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(f"""
+                    UPDATE dashboard_jobs SET status = 'running', updated_at = now()
+                    WHERE id = (
+                        SELECT id FROM dashboard_jobs
+                        WHERE status = 'pending'
+                           OR (status = 'running' AND updated_at < now() - interval '{STALE_AFTER}')
+                        ORDER BY id LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING *
+                """)
+                job = cur.fetchone()
+            conn.commit()
+        return job
+
+    def _save_progress(self, job, status):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE dashboard_jobs SET done = %s, failed = %s, status = %s, updated_at = now() WHERE id = %s",
+                    (job['done'], Json(job['failed']), status, job['id'])
+                )
+            conn.commit()
+        self.notify('job_progress', {
+            'job_id': job['id'],
+            'guild_id': str(job['guild_id']),
+            'kind': job['kind'],
+            'done': job['done'],
+            'total': len(job['items']),
+            'failed': len(job['failed']),
+            'status': status,
+        })
+
+    def _run_next(self):
+        job = self._claim()
+        if job is None:
+            return False
+        handler, on_finish = self._handlers.get(job['kind'], (None, None))
+        if handler is None:
+            print(f"Khong co handler cho job {job['id']} ({job['kind']})")
+            self._save_progress(job, 'failed')
+            return True
+
+        guild_id = job['guild_id']
+        items = job['items']
+        while job['done'] < len(items):
+            chunk = items[job['done']:job['done'] + self.concurrency]
+            results = self.fan_out(lambda item: handler(guild_id, item), chunk, max_workers=self.concurrency)
+            job['failed'].extend(item for item, ok in zip(chunk, results) if not ok)
+            job['done'] += len(chunk)
+            self._save_progress(job, 'running' if job['done'] < len(items) else 'done')
+        if not items:
+            self._save_progress(job, 'done')
+
+        if on_finish:
+            on_finish(guild_id, job)
+        return True
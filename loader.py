@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+
+class RequestLoader:
+    """Chay cac nguon du lieu doc lap (db, Discord API...) song song trong mot request
+    va ghi lai thoi gian cua tung nguon (ms) vao `timings`."""
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.timings = {}
+        self._sources = {}
+
+    def add(self, name, func, *args):
+        self._sources[name] = (func, args)
+        return self
+
+    def _timed(self, name, func, args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception as e:
+            print(f"Loi khi tai '{name}': {e}")
+            return None
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    def run(self):
+        """Tra ve {ten nguon: ket qua}. Nguon bi loi co ket qua None."""
+        sources, self._sources = self._sources, {}
+        if not sources:
+            return {}
+        if len(sources) == 1:
+            name, (func, args) = next(iter(sources.items()))
+            return {name: self._timed(name, func, args)}
+        workers = min(len(sources), self.max_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # copy context de thong ke cua request (metrics) theo sang thread con
+            futures = {
+                name: executor.submit(copy_context().run, self._timed, name, func, args)
+                for name, (func, args) in sources.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def server_timing(self):
+        """Gia tri cho header Server-Timing."""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.timings.items())
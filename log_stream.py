@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import deque
+
+GLOBAL_ROOM = 'logs'
+
+
+def guild_room(guild_id):
+    return f"logs:{guild_id}"
+
+
+class LogStream:
+    """Phat log cua bot toi cac client dang xem trang Live Log.
+
+    Moi guild giu mot ring buffer `buffer_size` dong de client mo trang sau van thay
+    log gan day. Log moi duoc gom lai va gui theo tung frame moi `flush_interval`
+    giay; neu mot frame vuot `max_batch` dong thi cac dong cu nhat bi bo va client
+    chi nhan so dong bi bo (tranh lam nghen client cham khi bot spam log).
+    Log khong co guild_id duoc gui cho moi client (room GLOBAL_ROOM)."""
+
+    def __init__(self, emit, spawn, sleep, buffer_size=200, flush_interval=0.25, max_batch=200):
+        self._emit = emit
+        self._spawn = spawn
+        self._sleep = sleep
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._buffers = {}  # room -> deque cac log gan day
+        self._pending = {}  # room -> (deque log chua gui, so dong bi bo)
+        self._last_ns = 0
+        # id cua worker: seq cua cac worker khac nhau khong bao gio trung nhau
+        self.worker_id = os.urandom(4).hex()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {'published': 0, 'frames': 0, 'dropped': 0}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._spawn(self._flush_loop)
+
+    def _next_seq(self):
+        # seq la chuoi '<ns 20 chu so>-<worker>': sap xep theo thoi gian giua cac worker,
+        # khong trung nhau. Gui dang chuoi vi so ns vuot Number.MAX_SAFE_INTEGER cua JS.
+        self._last_ns = max(self._last_ns + 1, time.time_ns())
+        return f"{self._last_ns:020d}-{self.worker_id}"
+
+    def _remember_locked(self, room, entry):
+        buffer = self._buffers.get(room)
+        if buffer is None:
+            buffer = self._buffers[room] = deque(maxlen=self.buffer_size)
+        buffer.append(entry)
+
+    def remember(self, entry):
+        """Chi luu vao lich su (log da duoc worker khac phat cho client)."""
+        guild_id = entry.get('guild_id')
+        with self._lock:
+            self._remember_locked(guild_room(guild_id) if guild_id else GLOBAL_ROOM, entry)
+
+    def publish(self, data):
+        """Luu log vao lich su va dua vao frame ke tiep. Tra ve entry da gan seq."""
+        guild_id = data.get('guild_id')
+        room = guild_room(guild_id) if guild_id else GLOBAL_ROOM
+        with self._lock:
+            entry = {**data, 'seq': self._next_seq()}
+            self._remember_locked(room, entry)
+
+            pending, dropped = self._pending.get(room, (None, 0))
+            if pending is None:
+                pending = deque()
+            pending.append(entry)
+            if len(pending) > self.max_batch:
+                pending.popleft()
+                dropped += 1
+                self._stats['dropped'] += 1
+            self._pending[room] = (pending, dropped)
+            self._stats['published'] += 1
+        self._ensure_started()
+        return entry
+
+    def history(self, guild_id):
+        """Log gan day cua guild (gom ca log chung), sap xep theo thu tu nhan."""
+        with self._lock:
+            entries = list(self._buffers.get(guild_room(guild_id), ())) + list(self._buffers.get(GLOBAL_ROOM, ()))
+        entries.sort(key=lambda e: e['seq'])
+        return entries[-self.buffer_size:]
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._stats['frames'] += len(pending)
+        for room, (entries, dropped) in pending.items():
+            self._emit('log_batch', {'entries': list(entries), 'dropped': dropped}, to=room)
+
+    def _flush_loop(self):
+        while True:
+            self._sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Loi khi gui log: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'rooms': len(self._buffers)}
@@ -0,0 +1,225 @@
+import bisect
+import re
+import threading
+import time
+
+DEFAULT_AVATAR_URL = "https://cdn.discordapp.com/embed/avatars/0.png"
+_WORD_START_RE = re.compile(r'(?<!\S)\S')
+
+
+class MemberEntry:
+    __slots__ = ('id', 'name', 'discriminator', 'avatar', 'bot', 'generation')
+
+    def __init__(self, user, generation):
+        self.id = int(user['id'])
+        self.name = user.get('global_name') or user.get('username')
+        self.discriminator = user.get('discriminator')
+        self.avatar = user.get('avatar')
+        self.bot = bool(user.get('bot'))
+        self.generation = generation
+
+    @property
+    def avatar_url(self):
+        if self.avatar:
+            return f"https://cdn.discordapp.com/avatars/{self.id}/{self.avatar}.png"
+        return DEFAULT_AVATAR_URL
+
+
+class MemberIndex:
+    """Danh sach member cua mot guild, key la user id (int)."""
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.synced_at = 0.0  # lan sync xong gan nhat
+        self.attempted_at = 0.0
+        self.complete = False
+        self.syncing = False
+        self.first_page = threading.Event()
+        self._members = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        # index sap xep cho tim kiem/phan trang, build lai khi danh sach thay doi
+        self._dirty = True
+        self._ids = []
+        self._ids_by_name = []
+        self._name_tokens = []  # (token, user id) sap xep theo token
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, user_id):
+        return int(user_id) in self._members
+
+    def get(self, user_id):
+        return self._members.get(int(user_id))
+
+    def values(self):
+        with self._lock:
+            return list(self._members.values())
+
+    def _ingest(self, page, generation):
+        with self._lock:
+            for member in page:
+                user = member.get('user')
+                if user and user.get('id'):
+                    entry = MemberEntry(user, generation)
+                    self._members[entry.id] = entry
+            self._dirty = True
+
+    def upsert(self, user):
+        """Them/cap nhat mot member tu su kien (khong can sync lai ca guild)."""
+        with self._lock:
+            # member them trong luc dang sync thuoc generation moi de khong bi _prune xoa
+            entry = MemberEntry(user, self._generation + (1 if self.syncing else 0))
+            self._members[entry.id] = entry
+            self._dirty = True
+        return entry
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._members.pop(int(user_id), None) is not None:
+                self._dirty = True
+
+    def _prune(self, generation):
+        # xoa member khong con xuat hien trong lan sync vua xong (da roi server)
+        with self._lock:
+            self._members = {uid: m for uid, m in self._members.items() if m.generation == generation}
+            self._dirty = True
+
+    def _ensure_sorted(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            humans = [m for m in self._members.values() if not m.bot]
+            self._ids = sorted(m.id for m in humans)
+            self._ids_by_name = [m.id for m in sorted(humans, key=lambda m: ((m.name or '').lower(), m.id))]
+            tokens = []
+            for m in humans:
+                # moi token la phan ten tinh tu dau mot tu, de tim duoc ca "van a" trong "nguyen van a"
+                name = (m.name or '').lower()
+                for match in _WORD_START_RE.finditer(name):
+                    tokens.append((name[match.start():], m.id))
+            tokens.sort()
+            self._name_tokens = tokens
+            self._dirty = False
+
+    def search_ids(self, query):
+        """Tra ve id member (khong tinh bot) co ten chua query o dau mot tu, theo thu tu id."""
+        self._ensure_sorted()
+        query = query.lower()
+        if not query:
+            return self._ids
+        tokens = self._name_tokens
+        found = set()
+        i = bisect.bisect_left(tokens, (query,))
+        while i < len(tokens) and tokens[i][0].startswith(query):
+            found.add(tokens[i][1])
+            i += 1
+        return sorted(found)
+
+    def page(self, query='', sort='id', offset=0, limit=24):
+        """Tra ve (tong so ket qua, danh sach MemberEntry cua trang)."""
+        if query:
+            ids = self.search_ids(query)
+            if sort == 'name':
+                ids = sorted(ids, key=lambda uid: ((self._members[uid].name or '').lower(), uid) if uid in self._members else ('', uid))
+        else:
+            self._ensure_sorted()
+            ids = self._ids_by_name if sort == 'name' else self._ids
+        members = self._members
+        entries = [members[uid] for uid in ids[offset:offset + limit] if uid in members]
+        return len(ids), entries
+
+
+class MemberSync:
+    """Dong bo toan bo member cua guild bang cursor `after`, chay nen.
+    Request chi doi trang dau tien khi guild chua tung duoc sync."""
+
+    def __init__(self, fetch_page, refresh_interval=300, page_size=1000, spawn=None):
+        self.fetch_page = fetch_page  # fetch_page(guild_id, after, limit) -> list | None
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self._spawn = spawn or self._spawn_thread
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._stats = {'syncs': 0, 'pages': 0, 'failures': 0}
+
+    @staticmethod
+    def _spawn_thread(func, *args):
+        threading.Thread(target=func, args=args, daemon=True).start()
+
+    def get(self, guild_id, wait=5.0):
+        guild_id = str(guild_id)
+        with self._lock:
+            index = self._indexes.get(guild_id)
+            if index is None:
+                index = self._indexes[guild_id] = MemberIndex(guild_id)
+            start = not index.syncing and time.monotonic() - index.attempted_at >= self.refresh_interval
+            if start:
+                index.syncing = True
+                index.attempted_at = time.monotonic()
+        if start:
+            self._spawn(self._sync, index)
+        if not index.first_page.is_set() and wait:
+            index.first_page.wait(wait)
+        return index
+
+    def peek(self, guild_id):
+        """Tra ve index da co cua guild (hoac None), khong kich hoat sync."""
+        return self._indexes.get(str(guild_id))
+
+    def apply_member(self, guild_id, member):
+        """Cap nhat member vao index da co cua guild. Tra ve MemberEntry hoac None."""
+        index = self.peek(guild_id)
+        user = (member or {}).get('user')
+        if index is None or not user or not user.get('id'):
+            return None
+        return index.upsert(user)
+
+    def remove_member(self, guild_id, user_id):
+        index = self.peek(guild_id)
+        if index is not None:
+            index.remove(user_id)
+
+    def refresh(self, guild_id):
+        """Bat buoc sync lai o lan get() tiep theo."""
+        with self._lock:
+            index = self._indexes.get(str(guild_id))
+            if index is not None:
+                index.attempted_at = 0.0
+
+    def _sync(self, index):
+        generation = index._generation + 1
+        after = 0
+        ok = True
+        try:
+            while True:
+                page = self.fetch_page(index.guild_id, after, self.page_size)
+                if page is None:
+                    ok = False
+                    break
+                index._ingest(page, generation)
+                with self._lock:
+                    self._stats['pages'] += 1
+                index.first_page.set()
+                if len(page) < self.page_size:
+                    break
+                after = max(int(m['user']['id']) for m in page if m.get('user'))
+        except Exception as e:
+            print(f"Loi khi sync member guild {index.guild_id}: {e}")
+            ok = False
+        finally:
+            if ok:
+                index._prune(generation)
+                index._generation = generation
+                index.synced_at = time.monotonic()
+                index.complete = True
+            with self._lock:
+                self._stats['syncs' if ok else 'failures'] += 1
+            index.syncing = False
+            # khong de request doi mai neu trang dau bi loi
+            index.first_page.set()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'guilds': len(self._indexes), 'members': sum(len(i) for i in self._indexes.values())}
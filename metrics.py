@@ -0,0 +1,150 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import psycopg2
+import psycopg2.extensions
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# thong ke cua request hien tai; fan_out/RequestLoader copy context sang thread con
+_request_stats = ContextVar('request_stats', default=None)
+
+
+def _format_labels(label_names, values):
+    if not label_names:
+        return ''
+    pairs = []
+    for name, value in zip(label_names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [dem theo bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in sorted(items):
+            names = self.label_names + ('le',)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(names, label_values + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, label_values + ('+Inf',))} {series[-1]}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+def render_stats(name, help_text, stats, label_name=None):
+    """Xuat dict stats (hoac {label: dict}) thanh cac dong gauge Prometheus."""
+    lines = []
+    rows = stats.items() if label_name else [(None, stats)]
+    by_key = {}
+    for label, values in rows:
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                by_key.setdefault(key, []).append((label, value))
+    for key, series in by_key.items():
+        metric = f"{name}_{key}"
+        lines.append(f"# HELP {metric} {help_text} ({key})")
+        lines.append(f"# TYPE {metric} gauge")
+        for label, value in series:
+            labels = _format_labels((label_name,), (label,)) if label_name else ''
+            lines.append(f"{metric}{labels} {value}")
+    return lines
+
+
+class RequestStats:
+    __slots__ = ('seconds', 'counts', '_lock')
+
+    def __init__(self):
+        self.seconds = {'discord': 0.0, 'db': 0.0, 'fragments': 0.0, 'render': 0.0}
+        self.counts = {'discord': 0, 'db': 0, 'fragments': 0, 'render': 0}
+        self._lock = threading.Lock()
+
+    def add(self, component, seconds):
+        with self._lock:
+            self.seconds[component] += seconds
+            self.counts[component] += 1
+
+
+def start_request():
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def end_request():
+    _request_stats.set(None)
+
+
+def record(component, seconds):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add(component, seconds)
+
+
+@contextmanager
+def track(component):
+    """Cong don thoi gian cua khoi lenh vao thong ke cua request hien tai."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, time.perf_counter() - start)
+
+
+_timed_cursor_classes = {}
+
+
+def _timed_cursor_class(base):
+    cls = _timed_cursor_classes.get(base)
+    if cls is None:
+        class TimedCursor(base):
+            def execute(self, query, vars=None):
+                with track('db'):
+                    return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                with track('db'):
+                    return super().executemany(query, vars_list)
+
+        TimedCursor.__name__ = f"Timed{base.__name__}"
+        cls = _timed_cursor_classes[base] = TimedCursor
+    return cls
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Ket noi psycopg2 do thoi gian moi query, giu nguyen cursor_factory ma route truyen vao."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+def connect_instrumented(dsn):
+    return psycopg2.connect(dsn, connection_factory=InstrumentedConnection)
@@ -0,0 +1,183 @@
+def _create_trigger(name, table, definition):
+    """CREATE TRIGGER chi khi trigger chua co. Khong DROP/CREATE lai moi lan khoi dong
+    vi ca hai deu khoa bang cua bot; doi dinh nghia trigger thi phai doi ten."""
+    return f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{name}' AND tgrelid = to_regclass('{table}')) THEN
+                CREATE TRIGGER {name} {definition};
+            END IF;
+        EXCEPTION WHEN duplicate_object THEN
+            NULL;  -- worker khac vua tao
+        END
+        $$;
+        """
+
+
+def _drop_trigger(name, table):
+    """DROP TRIGGER chi khi trigger dang ton tai (khong khoa bang khi khong co gi de xoa)."""
+    return f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{name}' AND tgrelid = to_regclass('{table}')) THEN
+                DROP TRIGGER {name} ON {table};
+            END IF;
+        END
+        $$;
+        """
+
+
+# bang/index rieng cua dashboard; index tao bang CONCURRENTLY de khong khoa bang cua bot
+MIGRATIONS = [
+    (
+        "dashboard_jobs",
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            kind TEXT NOT NULL,
+            items JSONB NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            failed JSONB NOT NULL DEFAULT '[]',
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    ),
+    (
+        "dashboard_socketio_messages",
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_socketio_messages (
+            id BIGSERIAL PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    ),
+    (
+        "dashboard_rollups",
+        # rollup giao dich theo ngay cho trang thong ke, cap nhat boi analytics.RollupRefresher
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_daily_rollups (
+            guild_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            transaction_type TEXT NOT NULL,
+            earned BIGINT NOT NULL DEFAULT 0,
+            spent BIGINT NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, transaction_type)
+        );
+        CREATE TABLE IF NOT EXISTS dashboard_user_daily (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            earned BIGINT NOT NULL DEFAULT 0,
+            spent BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, day)
+        );
+        CREATE INDEX IF NOT EXISTS idx_dashboard_user_daily_guild_day ON dashboard_user_daily (guild_id, day);
+        CREATE TABLE IF NOT EXISTS dashboard_rollup_state (
+            name TEXT PRIMARY KEY,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ
+        );
+        INSERT INTO dashboard_rollup_state (name) VALUES ('transactions') ON CONFLICT DO NOTHING;
+        """
+    ),
+    (
+        "guild_configs_version",
+        # version tang moi khi config_data doi (ke ca khi bot sua), dashboard dung de
+        # tu choi ghi de len ban moi hon va lam ETag; NOTIFY de xoa cache config
+        """
+        DO $$
+        BEGIN
+            -- ALTER TABLE khoa guild_configs ke ca khi cot da co: chi chay lan dau
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'guild_configs' AND column_name = 'config_version'
+            ) THEN
+                ALTER TABLE guild_configs ADD COLUMN IF NOT EXISTS config_version BIGINT NOT NULL DEFAULT 1;
+            END IF;
+        END
+        $$;
+        CREATE OR REPLACE FUNCTION dashboard_guild_config_version() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.config_data IS DISTINCT FROM OLD.config_data THEN
+                NEW.config_version := OLD.config_version + 1;
+                PERFORM pg_notify('dashboard_cache', json_build_object('type', 'config', 'guild_id', NEW.guild_id::text)::text);
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+        + _create_trigger(
+            'dashboard_guild_config_version', 'guild_configs',
+            "BEFORE UPDATE ON guild_configs FOR EACH ROW EXECUTE FUNCTION dashboard_guild_config_version()"
+        )
+    ),
+    (
+        "idx_users_guild_balance",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_guild_balance "
+        "ON users (guild_id, balance DESC, user_id)"
+    ),
+    (
+        "idx_transactions_guild_ts_id",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_guild_ts_id "
+        "ON transactions (guild_id, timestamp DESC, id DESC)"
+    ),
+]
+
+
+# trigger NOTIFY cho cache_events (CACHE_EVENTS=1); tat CACHE_EVENTS thi go bo de insert
+# vao bang giao dich cua bot khong phai NOTIFY vo ich
+CACHE_EVENT_MIGRATIONS = [
+    (
+        "dashboard_notify_transactions",
+        # bao cho dashboard guild nao vua co giao dich moi/bi xoa (xoa cache tong so giao dich)
+        """
+        CREATE OR REPLACE FUNCTION dashboard_notify_transactions() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('dashboard_cache', json_build_object('type', 'transactions', 'guild_id', guild_id::text)::text)
+            FROM (SELECT DISTINCT guild_id FROM changed_rows) changed;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+        + _create_trigger(
+            'dashboard_transactions_insert', 'transactions',
+            "AFTER INSERT ON transactions REFERENCING NEW TABLE AS changed_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION dashboard_notify_transactions()"
+        )
+        + _create_trigger(
+            'dashboard_transactions_delete', 'transactions',
+            "AFTER DELETE ON transactions REFERENCING OLD TABLE AS changed_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION dashboard_notify_transactions()"
+        )
+    ),
+]
+CACHE_EVENT_TEARDOWN = [
+    (
+        "drop_dashboard_notify_transactions",
+        _drop_trigger('dashboard_transactions_insert', 'transactions')
+        + _drop_trigger('dashboard_transactions_delete', 'transactions')
+    ),
+]
+
+
+def run_migrations(connection, cache_events=False):
+    """Chay cac lenh trong MIGRATIONS (va cai/go trigger cua cache_events).
+    connection() la context manager tra ve ket noi psycopg2."""
+    migrations = MIGRATIONS + (CACHE_EVENT_MIGRATIONS if cache_events else CACHE_EVENT_TEARDOWN)
+    try:
+        with connection() as conn:
+            # CREATE INDEX CONCURRENTLY khong chay duoc trong transaction
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                for name, statement in migrations:
+                    try:
+                        cur.execute(statement)
+                    except Exception as e:
+                        print(f"Loi khi chay migration {name}: {e}")
+    except Exception as e:
+        print(f"Khong the chay migration: {e}")
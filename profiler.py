@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Lay mau stack cua cac thread dang xu ly request moi `interval` giay.
+
+    Request cham hon `slow_ms` duoc ghi ra file dang "folded stacks"
+    (moi dong: frame;frame;frame so_mau) de dua vao flamegraph.pl hoac speedscope.
+
+    green=True (eventlet): moi request la mot greenlet chung OS thread, nen lay mau theo
+    greenlet: greenlet dang tam dung lay gr_frame, greenlet dang chay lay frame cua OS
+    thread. Thread lay mau va lock la ban goc (chua monkey-patch) de van chay khi
+    request chiem CPU."""
+
+    def __init__(self, out_dir, slow_ms=1000, interval=0.005, max_depth=64, green=False):
+        self.out_dir = out_dir
+        self.slow_ms = slow_ms
+        self.interval = interval
+        self.max_depth = max_depth
+        self.green = green
+        if green:
+            from eventlet import patcher
+            self._threading = patcher.original('threading')
+            self._time = patcher.original('time')
+        else:
+            self._threading = threading
+            self._time = time
+        self._active = {}  # thread id / greenlet -> (id OS thread, Counter)
+        self._lock = self._threading.Lock()
+        self._started = False
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._threading.Thread(target=self._loop, daemon=True).start()
+
+    def _current(self):
+        if self.green:
+            import greenlet
+            return greenlet.getcurrent()
+        return threading.get_ident()
+
+    def _loop(self):
+        while True:
+            self._time.sleep(self.interval)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for key, (thread_id, samples) in active.items():
+                frame = frames.get(thread_id)
+                if self.green and key.gr_frame is not None:
+                    # greenlet dang cho I/O: frame cua OS thread la cua greenlet khac
+                    frame = key.gr_frame
+                if frame is not None:
+                    samples[self._stack_key(frame)] += 1
+
+    def _stack_key(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def begin(self):
+        self._ensure_started()
+        with self._lock:
+            self._active[self._current()] = (self._threading.get_ident(), Counter())
+
+    def discard(self):
+        """Bo mau cua request hien tai (request loi, end() khong duoc goi)."""
+        with self._lock:
+            self._active.pop(self._current(), None)
+
+    def end(self, name, elapsed_ms):
+        """Dung lay mau; ghi file neu request cham. Tra ve duong dan file hoac None."""
+        with self._lock:
+            _, samples = self._active.pop(self._current(), (None, None))
+        if not samples or elapsed_ms < self.slow_ms:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        path = os.path.join(self.out_dir, f"{int(time.time() * 1000)}-{safe_name}-{int(elapsed_ms)}ms.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
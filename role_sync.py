@@ -0,0 +1,93 @@
+def parse_shop_role_rows(form):
+    """Doc cac dong role shop tu form edit_config. Dong thieu ten hoac gia bi bo qua."""
+    ids = form.getlist('shop_role_id[]')
+    names = form.getlist('shop_role_name[]')
+    prices = form.getlist('shop_role_price[]')
+    colors = form.getlist('shop_role_color[]')
+    creators = form.getlist('shop_role_creator_id[]')
+
+    rows = []
+    for i, name in enumerate(names):
+        name = name.strip()
+        if not (name and prices[i]):
+            continue
+        rows.append({
+            'role_id': int(ids[i]) if ids[i] else None,
+            'name': name,
+            'price': int(prices[i]),
+            'color': int((colors[i] or '#99aab5').lstrip('#'), 16),
+            'creator_id': int(creators[i]) if creators[i] else None,
+        })
+    return rows
+
+
+def form_role_ids(form):
+    """Moi role id con trong form, ke ca dong bi bo qua vi thieu ten/gia (role do khong bi xoa)."""
+    return {int(role_id) for role_id in form.getlist('shop_role_id[]') if role_id}
+
+
+def rendered_role_ids(form):
+    """Role id da hien thi tren form luc GET (truong shop_roles_rendered). Thieu truong thi rong."""
+    return {int(role_id) for role_id in form.get('shop_roles_rendered', '').split(',') if role_id.strip()}
+
+
+def plan_role_sync(rows, db_roles, discord_roles, form_ids, rendered_ids):
+    """So sanh form voi db va Discord.
+
+    db_roles: {role_id: {'price': ..., 'creator_id': ...}} cua guild.
+    discord_roles: danh sach role hien tai tu /guilds/{id}/roles.
+    form_ids: form_role_ids(form); rendered_ids: rendered_role_ids(form).
+    Chi xoa role da hien thi tren form roi bi bo khoi form: role bot vua tao (chua co trong
+    danh sach role cache luc GET) khong bi xoa nham.
+    Role id trong form ma khong thuoc shop cua guild se nam trong 'rejected'."""
+    discord_map = {int(r['id']): r for r in discord_roles}
+    plan = {'create': [], 'update': [], 'unchanged': [], 'rejected': [], 'delete': []}
+
+    for row in rows:
+        role_id = row['role_id']
+        if role_id is None:
+            plan['create'].append(row)
+            continue
+        if role_id not in db_roles:
+            plan['rejected'].append(role_id)
+            continue
+        current = discord_map.get(role_id)
+        if current and current['name'] == row['name'] and current['color'] == row['color']:
+            plan['unchanged'].append(row)
+        else:
+            plan['update'].append(row)
+
+    plan['delete'] = sorted((set(db_roles) & rendered_ids) - form_ids)
+    return plan
+
+
+def apply_role_sync(plan, guild_id, api_request, fan_out):
+    """Goi Discord song song cho cac role can xoa/sua/tao.
+
+    Tra ve (cac dong can ghi db, ten cac role tao that bai)."""
+    def delete(role_id):
+        api_request(f"/guilds/{guild_id}/roles/{role_id}", method='DELETE')
+
+    def update(row):
+        payload = {'name': row['name'], 'color': row['color']}
+        api_request(f"/guilds/{guild_id}/roles/{row['role_id']}", method='PATCH', payload=payload)
+        return row
+
+    def create(row):
+        payload = {'name': row['name'], 'color': row['color']}
+        created_role = api_request(f"/guilds/{guild_id}/roles", method='POST', payload=payload)
+        if not created_role:
+            return None
+        return {**row, 'role_id': int(created_role['id'])}
+
+    tasks = (
+        [(delete, role_id) for role_id in plan['delete']]
+        + [(update, row) for row in plan['update']]
+        + [(create, row) for row in plan['create']]
+    )
+    results = fan_out(lambda task: task[0](task[1]), tasks)
+
+    created = results[len(tasks) - len(plan['create']):]
+    failed = [row['name'] for row, result in zip(plan['create'], created) if result is None]
+    saved = plan['unchanged'] + plan['update'] + [row for row in created if row]
+    return saved, failed
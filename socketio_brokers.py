@@ -0,0 +1,183 @@
+# client manager cho Flask-SocketIO de nhieu worker/process dung chung su kien.
+# emit tu mot worker duoc gui qua broker toi moi worker khac; "app message"
+# (method 'app') dung de cac worker trao doi du lieu noi bo (vd: log moi cua bot).
+#
+# process ngoai (vd: bot) co the gui su kien toi client bang cach NOTIFY vao
+# channel Postgres voi payload JSON:
+#   {"method": "emit", "event": "config_updated", "data": [{...}], "namespace": "/", "room": null}
+import json
+import select
+import threading
+
+import psycopg2
+from psycopg2 import sql
+from socketio import PubSubManager
+
+# gioi han payload cua NOTIFY la 8000 byte; payload lon hon duoc luu vao bang
+MAX_NOTIFY_BYTES = 7900
+
+
+class _AppMessagesMixin:
+    def on_app_message(self, handler):
+        """handler(data) duoc goi khi worker khac gui app message."""
+        self._app_handlers.append(handler)
+
+    def publish_app_message(self, data):
+        self._publish({'method': 'app', 'data': data, 'host_id': self.host_id})
+
+    def _filter(self, message):
+        """Tach app message ra khoi luong message cua Socket.IO. Tra ve message can xu ly tiep hoac None."""
+        if isinstance(message, (str, bytes)):
+            try:
+                message = json.loads(message)
+            except ValueError:
+                return None
+        if isinstance(message, dict) and message.get('method') == 'app':
+            if message.get('host_id') != self.host_id:
+                for handler in self._app_handlers:
+                    try:
+                        handler(message.get('data'))
+                    except Exception as e:
+                        print(f"Loi khi xu ly app message: {e}")
+            return None
+        return message
+
+
+class MemoryHub:
+    """Broker trong bo nho, dung chung giua cac manager cung process (dung cho test)."""
+    _hubs = {}
+    _hubs_lock = threading.Lock()
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, channel):
+        with cls._hubs_lock:
+            hub = cls._hubs.get(channel)
+            if hub is None:
+                hub = cls._hubs[channel] = cls()
+            return hub
+
+    def subscribe(self, queue):
+        with self._lock:
+            self._subscribers.append(queue)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            queue.put(message)
+
+
+class MemoryManager(_AppMessagesMixin, PubSubManager):
+    name = 'memory'
+
+    def __init__(self, channel='socketio', write_only=False, logger=None, hub=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.hub = hub or MemoryHub.get(channel)
+        self._app_handlers = []
+
+    def _publish(self, data):
+        self.hub.publish(json.dumps(data))
+
+    def _listen(self):
+        queue = self.server.eio.create_queue()
+        self.hub.subscribe(queue)
+        while True:
+            message = self._filter(queue.get())
+            if message is not None:
+                yield message
+
+
+class PostgresManager(_AppMessagesMixin, PubSubManager):
+    """Broker dung LISTEN/NOTIFY cua Postgres, khong can them ha tang moi."""
+    name = 'postgres'
+
+    def __init__(self, dsn, channel='socketio', write_only=False, logger=None, connect=None, poll_timeout=5.0):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.dsn = dsn
+        self.poll_timeout = poll_timeout
+        self._connect = connect or psycopg2.connect
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._large_count = 0
+        self._app_handlers = []
+
+    def _get_publish_conn(self):
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = self._connect(self.dsn)
+            self._publish_conn.autocommit = True
+        return self._publish_conn
+
+    def _publish(self, data):
+        payload = json.dumps(data)
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    with self._get_publish_conn().cursor() as cur:
+                        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+                            payload = '@' + str(self._store_large(cur, payload))
+                        cur.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except psycopg2.OperationalError:
+                    # mat ket noi: thu lai mot lan voi ket noi moi
+                    self._publish_conn = None
+                    if attempt:
+                        raise
+
+    def _store_large(self, cur, payload):
+        cur.execute("INSERT INTO dashboard_socketio_messages (payload) VALUES (%s) RETURNING id", (payload,))
+        message_id = cur.fetchone()[0]
+        self._large_count += 1
+        if self._large_count % 100 == 0:
+            cur.execute("DELETE FROM dashboard_socketio_messages WHERE created_at < now() - interval '5 minutes'")
+        return message_id
+
+    def _select(self):
+        if self.server is not None and self.server.async_mode == 'eventlet':
+            from eventlet.green import select as green_select
+            return green_select.select
+        return select.select
+
+    def _listen(self):
+        wait = self._select()
+        while True:
+            conn = None
+            try:
+                conn = self._connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                while True:
+                    wait([conn], [], [], self.poll_timeout)
+                    conn.poll()
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        if payload.startswith('@'):
+                            payload = self._load_large(conn, payload[1:])
+                        message = self._filter(payload) if payload else None
+                        if message is not None:
+                            yield message
+            except psycopg2.Error as e:
+                print(f"Mat ket noi LISTEN Postgres, thu lai sau: {e}")
+                self.server.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _load_large(self, conn, message_id):
+        with conn.cursor() as cur:
+            cur.execute("SELECT payload FROM dashboard_socketio_messages WHERE id = %s", (int(message_id),))
+            row = cur.fetchone()
+        return row[0] if row else None
+
+
+def create_client_manager(kind, dsn=None, channel='dashboard_socketio'):
+    """kind: 'postgres', 'memory' hoac rong (khong dung broker, chi chay mot worker)."""
+    if kind == 'postgres':
+        return PostgresManager(dsn, channel=channel)
+    if kind == 'memory':
+        return MemoryManager(channel=channel)
+    return None
@@ -0,0 +1,6 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# app.py monkey-patch toan process khi chay eventlet; test dung thread thuong
+os.environ['ASYNC_MODE'] = 'threading'
@@ -0,0 +1,97 @@
+import pytest
+
+import app
+from bulk_edit import BulkEditError, apply_bulk_edit, parse_csv, parse_json_changes, parse_user_ids, validate_changes
+
+
+def test_parse_csv_skips_header_comments_and_blank_lines():
+    text = "user_id,amount,fake_boosts\n\n# ghi chu\n111, 50\n222,-20,3\n"
+    assert parse_csv(text) == [
+        {'user_id': 111, 'amount': 50, 'fake_boosts': None},
+        {'user_id': 222, 'amount': -20, 'fake_boosts': 3},
+    ]
+
+
+def test_parse_csv_reports_line_of_bad_value():
+    with pytest.raises(BulkEditError, match='Dòng 3'):
+        parse_csv("111,5\n222,6\n333,abc\n")
+    with pytest.raises(BulkEditError, match='thiếu cột amount'):
+        parse_csv("111\n")
+
+
+def test_parse_user_ids_splits_on_any_separator():
+    changes = parse_user_ids("111, 222;333\n\n444", '10', '2')
+    assert [c['user_id'] for c in changes] == [111, 222, 333, 444]
+    assert all(c['amount'] == 10 and c['fake_boosts'] == 2 for c in changes)
+    assert parse_user_ids("111", '5')[0]['fake_boosts'] is None
+    with pytest.raises(BulkEditError):
+        parse_user_ids("111 abc", '5')
+    with pytest.raises(BulkEditError):
+        parse_user_ids("111", '')
+
+
+def test_parse_json_changes():
+    assert parse_json_changes([{'user_id': '111', 'amount': 5, 'fake_boosts': 0}]) == [
+        {'user_id': 111, 'amount': 5, 'fake_boosts': 0}
+    ]
+    for bad in (None, {'user_id': 1}, [{'user_id': 1}], ['x']):
+        with pytest.raises(BulkEditError):
+            parse_json_changes(bad)
+
+
+def test_validate_changes_merges_duplicates_last_wins():
+    changes = [
+        {'user_id': 1, 'amount': 5, 'fake_boosts': None},
+        {'user_id': 2, 'amount': 6, 'fake_boosts': None},
+        {'user_id': 1, 'amount': 7, 'fake_boosts': 1},
+    ]
+    assert validate_changes(changes, 10) == [
+        {'user_id': 1, 'amount': 7, 'fake_boosts': 1},
+        {'user_id': 2, 'amount': 6, 'fake_boosts': None},
+    ]
+
+
+def test_validate_changes_limits():
+    with pytest.raises(BulkEditError, match='Không có'):
+        validate_changes([], 10)
+    with pytest.raises(BulkEditError, match='Tối đa 1'):
+        validate_changes([{'user_id': i, 'amount': 1, 'fake_boosts': None} for i in range(2)], 1)
+    with pytest.raises(BulkEditError, match='không được âm'):
+        validate_changes([{'user_id': 1, 'amount': 1, 'fake_boosts': -1}], 10)
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return [(1, 0, 5)]
+
+
+def test_apply_bulk_edit_sends_arrays_in_one_statement():
+    cur = RecordingCursor()
+    changes = [{'user_id': 1, 'amount': 5, 'fake_boosts': None}, {'user_id': 2, 'amount': -3, 'fake_boosts': 4}]
+    assert apply_bulk_edit(cur, 9, changes, 'add', 'note') == [(1, 0, 5)]
+    (_, insert_params), (sql, params) = cur.executed
+    assert insert_params == (9, [1, 2])
+    assert params == {'guild_id': 9, 'user_ids': [1, 2], 'amounts': [5, -3], 'fake_boosts': [None, 4], 'mode': 'add', 'note': 'note'}
+    # chi ghi transactions cho dong co so du thay doi
+    assert 'WHERE new_balance <> old_balance' in sql
+
+
+def test_apply_bulk_edit_rejects_unknown_mode():
+    cur = RecordingCursor()
+    with pytest.raises(BulkEditError):
+        apply_bulk_edit(cur, 9, [{'user_id': 1, 'amount': 5, 'fake_boosts': None}], 'multiply', 'note')
+    assert cur.executed == []
+
+
+@pytest.mark.parametrize('body', ['[1, 2]', '5', '"text"', 'null', 'not json'])
+def test_bulk_api_rejects_non_object_body(body):
+    app.app.config.update(TESTING=True)
+    res = app.app.test_client().post('/api/guild/1/members/bulk', data=body, content_type='application/json')
+    assert res.status_code == 400
+    assert 'error' in res.get_json()
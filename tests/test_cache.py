@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from cache import EntityCache, TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache('t', 60, 10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader))) for _ in range(8)]
+    threads[0].start()
+    started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert calls == [1]
+    assert results == ['value'] * 8
+    assert cache.stats()['loads'] == 1
+
+
+def test_waiters_get_the_loader_error_and_it_is_not_cached():
+    cache = TTLCache('t', 60, 10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2)
+        raise RuntimeError('discord down')
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_load('k', failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    owner = threading.Thread(target=call)
+    owner.start()
+    started.wait(2)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    owner.join(2)
+    waiter.join(2)
+    assert errors == ['discord down', 'discord down']
+    assert cache.get_or_load('k', lambda: 'ok') == 'ok'
+
+
+def test_none_result_is_not_cached():
+    cache = TTLCache('t', 60, 10)
+    calls = []
+    assert cache.get_or_load('k', lambda: calls.append(1)) is None
+    assert cache.get_or_load('k', lambda: calls.append(1)) is None
+    assert len(calls) == 2
+
+
+def test_expired_entry_is_reloaded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cache.time.monotonic', lambda: now[0])
+    cache = TTLCache('t', 10, 10)
+    cache.set('k', 'old')
+    now[0] += 9
+    assert cache.get_or_load('k', lambda: 'new') == 'old'
+    now[0] += 2
+    assert cache.get_or_load('k', lambda: 'new') == 'new'
+
+
+def test_eviction_drops_least_recently_used():
+    cache = TTLCache('t', 60, 3)
+    for key in 'abc':
+        cache.set(key, key.upper())
+    assert cache.get('a') == 'A'  # a moi duoc dung: b cu nhat
+    cache.set('d', 'D')
+    assert cache.get('b') is None
+    assert [cache.get(k) for k in 'acd'] == ['A', 'C', 'D']
+    cache.set('e', 'E')
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 2
+
+
+class MemoryStore:
+    def __init__(self):
+        self.data = {}
+
+    def put(self, name, key, value):
+        self.data[(name, key)] = value
+
+    def delete(self, name, key):
+        self.data.pop((name, key), None)
+
+
+def test_warmed_entry_is_served_then_revalidated_once():
+    spawned = []
+    store = MemoryStore()
+    cache = TTLCache('roles', 60, 10, store=store, spawn=lambda func, *args: spawned.append((func, args)))
+    cache.warm([('1', 'snapshot')])
+    assert cache.get_or_load('1', lambda: 'fresh') == 'snapshot'
+    assert cache.get_or_load('1', lambda: 'fresh') == 'snapshot'
+    assert len(spawned) == 1
+    func, args = spawned[0]
+    func(*args)
+    assert cache.get('1') == 'fresh'
+    assert store.data[('roles', '1')] == 'fresh'
+
+
+def test_warm_does_not_overwrite_live_entries():
+    cache = TTLCache('t', 60, 10, spawn=lambda func, *args: None)
+    cache.set('1', 'live')
+    cache.warm([('1', 'snapshot'), ('2', 'snapshot')])
+    assert cache.get('1') == 'live'
+    assert cache.get('2') == 'snapshot'
+
+
+def test_entity_cache_invalidate_guild():
+    cache = EntityCache()
+    for entity in ('guild', 'channels', 'roles', 'user'):
+        cache[entity].set('5', entity)
+    cache.invalidate_guild(5)
+    assert [cache[e].get('5') for e in ('guild', 'channels', 'roles')] == [None, None, None]
+    assert cache['user'].get('5') == 'user'
+
+
+def test_unknown_entity():
+    with pytest.raises(KeyError):
+        EntityCache()['emoji']
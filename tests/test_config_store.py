@@ -0,0 +1,163 @@
+import copy
+import random
+import re
+
+import pytest
+
+from config_store import ConfigStore, StaleConfigError, diff_config
+
+_MISSING = object()
+
+
+def pg_delete_path(doc, path):
+    """Ngu nghia cua jsonb #- text[] (chi object): path khong ton tai thi khong doi."""
+    doc = copy.deepcopy(doc)
+    parent = doc
+    for key in path[:-1]:
+        if not isinstance(parent, dict) or key not in parent:
+            return doc
+        parent = parent[key]
+    if isinstance(parent, dict):
+        parent.pop(path[-1], None)
+    return doc
+
+
+def pg_jsonb_set(doc, path, value):
+    """Ngu nghia cua jsonb_set(doc, path, value, create_missing => true) (chi object):
+    key cuoi duoc tao neu thieu, nhung cap trung gian thieu thi doc giu nguyen."""
+    doc = copy.deepcopy(doc)
+    parent = doc
+    for key in path[:-1]:
+        if not isinstance(parent, dict) or key not in parent:
+            return doc
+        parent = parent[key]
+    if isinstance(parent, dict):
+        parent[path[-1]] = copy.deepcopy(value)
+    return doc
+
+
+class FakeConfigCursor:
+    """Mot dong guild_configs; UPDATE duoc tinh lai bang ngu nghia jsonb cua Postgres."""
+
+    def __init__(self, config, version):
+        self.config = config
+        self.version = version
+        self.updates = 0
+        self._row = None
+
+    def execute(self, sql, params):
+        if sql.startswith('SELECT'):
+            self._row = (copy.deepcopy(self.config), self.version)
+            return
+        assert sql.startswith('UPDATE guild_configs SET config_data = ')
+        params = list(params)
+        doc = {} if self.config is None else copy.deepcopy(self.config)
+        # placeholder xuat hien theo dung thu tu ap dung (bieu thuc long nhau tu trong ra)
+        for op in re.findall(r"#- %s|, %s, %s\)", sql):
+            if op.startswith('#-'):
+                doc = pg_delete_path(doc, params.pop(0))
+            else:
+                path, value = params.pop(0), params.pop(0)
+                doc = pg_jsonb_set(doc, path, value.adapted)
+        assert params == [1]  # guild_id
+        self.config = doc
+        self.version += 1
+        self.updates += 1
+        self._row = (self.version,)
+
+    def fetchone(self):
+        return self._row
+
+
+def save(old, new, version=1):
+    cur = FakeConfigCursor(old, version)
+    new_version = ConfigStore(cache=None).save(cur, 1, version, copy.deepcopy(new))
+    return cur, new_version
+
+
+def test_nested_set():
+    old = {'CURRENCY_RATES': {'default': {'MESSAGES_PER_COIN': 10}, 'channels': {'1': {'X': 1}}}, 'EMBED_COLOR': '0x1'}
+    new = copy.deepcopy(old)
+    new['CURRENCY_RATES']['default']['MESSAGES_PER_COIN'] = 20
+    new['CURRENCY_RATES']['categories'] = {'9': {'X': 2}}
+    cur, version = save(old, new)
+    assert cur.config == new
+    assert version == 2
+
+
+def test_nested_delete():
+    old = {'MESSAGES': {'A': 'a', 'B': 'b'}, 'SHOP_DISPLAY_STYLE': 'embed'}
+    new = {'MESSAGES': {'A': 'a'}}
+    cur, _ = save(old, new)
+    assert cur.config == new
+
+
+def test_type_change_dict_to_scalar_at_depth_two():
+    old = {'CURRENCY_RATES': {'channels': {'1': {'MESSAGES_PER_COIN': 5}}, 'default': {}}}
+    new = {'CURRENCY_RATES': {'channels': 7, 'default': {}}}
+    sets, deletes = diff_config(old, new)
+    assert sets == [(('CURRENCY_RATES', 'channels'), 7)] and deletes == []
+    cur, _ = save(old, new)
+    assert cur.config == new
+
+
+def test_type_change_scalar_to_dict_and_null_config():
+    old = {'CUSTOM_ROLE_CONFIG': 5}
+    new = {'CUSTOM_ROLE_CONFIG': {'PRICE': 1}, 'QNA_DATA': [{'q': 1}]}
+    assert save(old, new)[0].config == new
+    assert save(None, new)[0].config == new
+
+
+def test_no_change_skips_update():
+    old = {'MESSAGES': {'A': 'a'}}
+    cur, version = save(old, copy.deepcopy(old), version=4)
+    assert cur.updates == 0 and version == 4
+
+
+def test_stale_version_is_rejected():
+    cur = FakeConfigCursor({'MESSAGES': {}}, 5)
+    with pytest.raises(StaleConfigError) as info:
+        ConfigStore(cache=None).save(cur, 1, 4, {'MESSAGES': {'A': 'a'}})
+    assert info.value.expected_version == 4
+    assert cur.updates == 0 and cur.config == {'MESSAGES': {}}
+
+
+def test_missing_row_is_stale():
+    cur = FakeConfigCursor(None, 1)
+    cur.execute = lambda sql, params: setattr(cur, '_row', None)
+    with pytest.raises(StaleConfigError):
+        ConfigStore(cache=None).save(cur, 1, 1, {})
+
+
+def random_value(rng, depth):
+    roll = rng.random()
+    if depth < 3 and roll < 0.4:
+        return {rng.choice('abcde'): random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+    if roll < 0.5:
+        return [rng.randrange(3) for _ in range(rng.randrange(3))]
+    return rng.choice([0, 1, 'x', 'y', None, True, 2.5])
+
+
+def mutate(rng, value, depth=0):
+    if not isinstance(value, dict) or rng.random() < 0.15:
+        return random_value(rng, depth)
+    value = dict(value)
+    for key in list(value):
+        roll = rng.random()
+        if roll < 0.2:
+            del value[key]
+        elif roll < 0.6:
+            value[key] = mutate(rng, value[key], depth + 1)
+    if rng.random() < 0.3:
+        value[rng.choice('fgh')] = random_value(rng, depth + 1)
+    return value
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_partial_update_matches_full_replace(seed):
+    rng = random.Random(seed)
+    old = {key: random_value(rng, 1) for key in 'KLMN'}
+    new = mutate(rng, old)
+    if not isinstance(new, dict):
+        new = {'K': new}
+    assert save(old, new)[0].config == new
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from discord_client import DiscordClient
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return {}
+
+
+def test_same_route_requests_run_in_parallel():
+    client = DiscordClient('token', base_url='http://discord.invalid')
+
+    def request(method, url, **kwargs):
+        time.sleep(0.2)
+        return FakeResponse(headers={'X-RateLimit-Remaining': '40', 'X-RateLimit-Reset-After': '1'})
+
+    client.session.request = request
+    threads = [
+        threading.Thread(target=client.request, args=('GET', f'/users/{100000 + i}'))
+        for i in range(5)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - start < 0.6
+    assert client.stats()['calls'] == 5
+
+
+def test_exhausted_bucket_waits_for_reset():
+    client = DiscordClient('token', base_url='http://discord.invalid')
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(time.monotonic())
+        return FakeResponse(headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '0.2'})
+
+    client.session.request = request
+    client.request('GET', '/users/100000')
+    client.request('GET', '/users/100001')
+    assert calls[1] - calls[0] >= 0.15
+
+
+def test_in_flight_claims_are_not_overwritten_by_stale_header():
+    client = DiscordClient('token', base_url='http://discord.invalid')
+    route = client.route_key('GET', '/users/100000')
+    bucket = client._bucket_for(route)
+    bucket.remaining = 2
+    bucket.reset_at = time.monotonic() + 10
+    client._update_limits(route, bucket, FakeResponse(headers={'X-RateLimit-Remaining': '5'}))
+    assert bucket.remaining == 2
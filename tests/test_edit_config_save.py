@@ -0,0 +1,81 @@
+import pytest
+
+import app
+from config_store import ConfigEntry, StaleConfigError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.pending.append(sql.strip().split()[0])
+        if sql.startswith('SELECT role_id, price, creator_id FROM shop_roles'):
+            self._rows = [{'role_id': 111, 'price': 100, 'creator_id': None}]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    def __init__(self):
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    conn = FakeConnection()
+    calls = {'discord': [], 'emit': []}
+    monkeypatch.setattr(app, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(app.config_store, 'get', lambda conn, guild_id: ConfigEntry(3, {}))
+    monkeypatch.setattr(app, 'get_guild_roles', lambda guild_id: [{'id': '111', 'name': 'Old', 'color': 0}])
+    monkeypatch.setattr(app, 'discord_api_request', lambda endpoint, method='GET', payload=None: calls['discord'].append((method, endpoint)) or {})
+    monkeypatch.setattr(app.socketio, 'emit', lambda event, data, **kwargs: calls['emit'].append(event))
+    app.app.config.update(TESTING=True, SECRET_KEY='test')
+    with app.app.test_client() as client:
+        yield client, conn, calls
+
+
+def test_stale_config_still_commits_shop_role_changes(client, monkeypatch):
+    client, conn, calls = client
+
+    def stale(cur, guild_id, expected_version, new_config):
+        raise StaleConfigError(guild_id, expected_version)
+
+    monkeypatch.setattr(app.config_store, 'save', stale)
+    # role 111 da hien thi tren form roi bi xoa
+    res = client.post('/edit/1', data={'config_version': '3', 'shop_roles_rendered': '111'})
+    assert res.status_code == 302
+    assert calls['discord'] == [('DELETE', '/guilds/1/roles/111')]
+    assert 'DELETE' in conn.committed
+    assert conn.rollbacks == 1
+    assert calls['emit'] == ['config_updated']
+
+
+def test_saved_config_commits_roles_then_config(client, monkeypatch):
+    client, conn, calls = client
+    saved = []
+    monkeypatch.setattr(app.config_store, 'save', lambda cur, *args: saved.append(args) or 4)
+    client.post('/edit/1', data={'config_version': '3', 'shop_roles_rendered': '111'})
+    assert saved and saved[0][:2] == (1, 3)
+    assert 'DELETE' in conn.committed and conn.rollbacks == 0
@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app import decode_history_cursor, encode_history_cursor
+
+
+def token(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+
+def test_round_trip():
+    row = {'timestamp': datetime(2024, 5, 1, 12, 30, 5, 123456), 'id': 42}
+    assert decode_history_cursor(encode_history_cursor(row, 'next')) == (row['timestamp'], 42, 'next')
+
+
+@pytest.mark.parametrize('data', [
+    {'t': 'not a timestamp', 'i': 1, 'd': 'next'},
+    {'t': 12345, 'i': 1, 'd': 'next'},
+    {'t': None, 'i': 1, 'd': 'prev'},
+    {'t': '2024-05-01T12:30:05', 'i': 'x', 'd': 'next'},
+    {'t': '2024-05-01T12:30:05', 'i': 2 ** 70, 'd': 'next'},
+    {'t': '2024-05-01T12:30:05', 'i': 1, 'd': 'sideways'},
+    {'t': '2024-05-01T12:30:05', 'd': 'next'},
+    ['2024-05-01T12:30:05', 1, 'next'],
+])
+def test_tampered_cursor_falls_back_to_first_page(data):
+    assert decode_history_cursor(token(data)) is None
+
+
+def test_garbage_token():
+    assert decode_history_cursor('%%%') is None
+    assert decode_history_cursor('') is None
@@ -0,0 +1,40 @@
+from log_stream import LogStream
+
+
+def make_stream(**kwargs):
+    emitted = []
+    stream = LogStream(
+        lambda event, data, to: emitted.append((event, data, to)),
+        lambda target: None, lambda seconds: None, **kwargs
+    )
+    return stream, emitted
+
+
+def test_seq_is_unique_string_even_with_same_clock(monkeypatch):
+    stream, _ = make_stream()
+    monkeypatch.setattr('log_stream.time.time_ns', lambda: 1_700_000_000_000_000_000)
+    seqs = [stream.publish({'message': str(i)})['seq'] for i in range(100)]
+    assert all(isinstance(seq, str) for seq in seqs)
+    assert len(set(seqs)) == 100
+    assert seqs == sorted(seqs)
+
+
+def test_history_merges_workers_in_time_order():
+    stream, _ = make_stream()
+    other, _ = make_stream()
+    first = other.publish({'message': 'a', 'guild_id': '1'})
+    second = stream.publish({'message': 'b', 'guild_id': '1'})
+    stream.remember(first)
+    assert first['seq'] != second['seq']
+    assert [e['message'] for e in stream.history('1')] == ['a', 'b']
+
+
+def test_flush_drops_oldest_over_max_batch():
+    stream, emitted = make_stream(max_batch=2)
+    for i in range(5):
+        stream.publish({'message': str(i), 'guild_id': '7'})
+    stream.flush()
+    (event, data, room), = emitted
+    assert event == 'log_batch' and room == 'logs:7'
+    assert [e['message'] for e in data['entries']] == ['3', '4']
+    assert data['dropped'] == 3
@@ -0,0 +1,92 @@
+from member_sync import MemberIndex, MemberSync
+
+
+def member(user_id, name, bot=False):
+    return {'user': {'id': str(user_id), 'username': name, 'bot': bot}}
+
+
+class FakeGuild:
+    """Tra ve member theo cursor `after` giong /guilds/{id}/members."""
+
+    def __init__(self, members):
+        self.members = members
+        self.calls = []
+        self.fail_after = None
+
+    def fetch_page(self, guild_id, after, limit):
+        self.calls.append((after, limit))
+        if self.fail_after is not None and after >= self.fail_after:
+            return None
+        page = [m for m in sorted(self.members, key=lambda m: int(m['user']['id'])) if int(m['user']['id']) > after]
+        return page[:limit]
+
+
+def sync_now(guild, page_size=2):
+    return MemberSync(guild.fetch_page, refresh_interval=0, page_size=page_size, spawn=lambda func, *args: func(*args))
+
+
+def test_pages_with_after_cursor_until_short_page():
+    guild = FakeGuild([member(i, f'user{i}') for i in (50, 10, 40, 20, 30)])
+    sync = sync_now(guild)
+    index = sync.get(1)
+    assert guild.calls == [(0, 2), (20, 2), (40, 2)]
+    assert index.complete
+    assert index.search_ids('') == [10, 20, 30, 40, 50]
+    assert sync.stats()['pages'] == 3
+
+
+def test_resync_prunes_departed_members():
+    guild = FakeGuild([member(i, f'user{i}') for i in (1, 2, 3)])
+    sync = sync_now(guild)
+    index = sync.get(1)
+    guild.members = [member(1, 'user1'), member(3, 'renamed')]
+    sync.get(1)
+    assert 2 not in index
+    assert index.get(3).name == 'renamed'
+    assert index.search_ids('') == [1, 3]
+
+
+def test_failed_resync_keeps_previous_members():
+    guild = FakeGuild([member(i, f'user{i}') for i in (1, 2, 3)])
+    sync = sync_now(guild)
+    index = sync.get(1)
+    guild.members = [member(1, 'user1')]
+    guild.fail_after = 0
+    sync.get(1)
+    assert index.search_ids('') == [1, 2, 3]
+    assert sync.stats()['failures'] == 1
+    assert not index.syncing
+
+
+def test_member_added_during_sync_survives_prune():
+    guild = FakeGuild([member(1, 'a'), member(2, 'b'), member(3, 'c')])
+    sync = MemberSync(guild.fetch_page, refresh_interval=0, page_size=2, spawn=lambda func, *args: None)
+    index = sync.get(1, wait=0)
+    assert index.syncing
+    # su kien member moi den giua hai trang cua lan sync
+    original = guild.fetch_page
+
+    def fetch_page(guild_id, after, limit):
+        if after:
+            sync.apply_member(1, member(99, 'joined'))
+        return original(guild_id, after, limit)
+
+    sync.fetch_page = fetch_page
+    sync._sync(index)
+    assert 99 in index
+    assert index.search_ids('') == [1, 2, 3, 99]
+
+
+def test_search_ids_matches_word_starts_and_skips_bots():
+    index = MemberIndex('1')
+    index._ingest([
+        member(1, 'nguyen van a'),
+        member(2, 'Van Tran'),
+        member(3, 'avan'),
+        member(4, 'van bot', bot=True),
+    ], 1)
+    assert index.search_ids('van') == [1, 2]
+    assert index.search_ids('VAN A') == [1]
+    assert index.search_ids('zzz') == []
+    total, entries = index.page('', sort='name', offset=0, limit=2)
+    assert total == 3 and [m.id for m in entries] == [3, 1]
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import app
+
+
+class FakeUsersCursor:
+    """Chi hieu cac query cua _balance_page tren bang users trong bo nho."""
+
+    def __init__(self, balances):
+        self.rows = sorted(
+            ({'user_id': uid, 'balance': balance} for uid, balance in balances.items()),
+            key=lambda r: (-r['balance'], r['user_id'])
+        )
+        self.queries = 0
+        self._result = []
+
+    def execute(self, sql, params):
+        self.queries += 1
+        if 'balance < 0' in sql:
+            self._result = [r for r in self.rows if r['balance'] < 0]
+        elif 'balance <= %s' in sql:
+            _, top, _, after_id, limit = params
+            self._result = [
+                r for r in self.rows
+                if 0 < r['balance'] and (r['balance'] < top or (r['balance'] == top and r['user_id'] > after_id))
+            ][:limit]
+        else:
+            _, limit = params
+            self._result = [r for r in self.rows if r['balance'] > 0][:limit]
+
+    def fetchall(self):
+        return self._result
+
+
+def expected_order(candidate_ids, balances):
+    return sorted(((uid, balances.get(uid, 0)) for uid in candidate_ids), key=lambda row: (-row[1], row[0]))
+
+
+@pytest.mark.parametrize('offset', [0, 24, 480, 960, 1176, 1500])
+def test_balance_page_matches_full_sort(monkeypatch, offset):
+    monkeypatch.setattr(app, 'BALANCE_SCAN_BATCH', 50)
+    rng = random.Random(offset)
+    members = list(range(1, 1201))
+    # mot phan la member da roi server, mot phan chua co trong db, vai so du am / bang nhau
+    balances = {uid: rng.choice([0, -5, 10, 10, 100, rng.randrange(1, 10_000)]) for uid in range(1, 1600) if uid % 7}
+    candidate_ids = [uid for uid in members if uid % 5]
+    candidates = set(candidate_ids)
+    cur = FakeUsersCursor(balances)
+    rows = app._balance_page(cur, 1, candidate_ids, candidates.__contains__, offset, 24)
+    assert rows == expected_order(candidate_ids, balances)[offset:offset + 24]
+
+
+def test_first_page_reads_only_first_batches(monkeypatch):
+    monkeypatch.setattr(app, 'BALANCE_SCAN_BATCH', 50)
+    balances = {uid: 1000 + uid for uid in range(1, 5001)}
+    cur = FakeUsersCursor(balances)
+    candidate_ids = list(range(1, 5001))
+    rows = app._balance_page(cur, 1, candidate_ids, lambda uid: True, 0, 24)
+    assert [uid for uid, _ in rows] == list(range(5000, 4976, -1))
+    assert cur.queries == 1
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+from migrations import run_migrations
+
+
+class RecordingCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        self.executed.append(statement)
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.executed = []
+        self.autocommit = False
+
+    def cursor(self):
+        return RecordingCursor(self.executed)
+
+
+def run(cache_events):
+    conn = RecordingConnection()
+
+    @contextmanager
+    def connection():
+        yield conn
+
+    run_migrations(connection, cache_events=cache_events)
+    return '\n'.join(conn.executed)
+
+
+def test_transaction_trigger_only_with_cache_events():
+    enabled = run(cache_events=True)
+    disabled = run(cache_events=False)
+    assert 'CREATE TRIGGER dashboard_transactions_insert' in enabled
+    assert 'CREATE TRIGGER dashboard_transactions_insert' not in disabled
+    assert 'DROP TRIGGER dashboard_transactions_insert' in disabled
+
+
+def test_triggers_are_not_recreated_on_every_start():
+    for sql in (run(cache_events=True), run(cache_events=False)):
+        for name in ('dashboard_transactions_insert', 'dashboard_transactions_delete', 'dashboard_guild_config_version'):
+            assert f'DROP TRIGGER IF EXISTS {name}' not in sql
+            assert f"tgname = '{name}'" in sql
+
+
+def test_config_version_trigger_installed_without_cache_events():
+    assert 'CREATE TRIGGER dashboard_guild_config_version' in run(cache_events=False)
+
+
+def test_config_version_column_added_only_when_missing():
+    sql = run(cache_events=False)
+    alter = sql.index('ALTER TABLE guild_configs ADD COLUMN')
+    assert "column_name = 'config_version'" in sql[:alter]
+    assert sql.rfind('IF NOT EXISTS (', 0, alter) > sql.rfind('$$', 0, alter)
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from profiler import SamplingProfiler
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_slow_request_thread(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), slow_ms=0, interval=0.002)
+    profiler.begin()
+    busy(0.1)
+    path = profiler.end('route', 100)
+    with open(path, encoding='utf-8') as f:
+        assert 'busy (test_profiler.py' in f.read()
+
+
+def test_discard_drops_unfinished_request(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), slow_ms=0)
+    worker = threading.Thread(target=profiler.begin)
+    worker.start()
+    worker.join()
+    profiler.begin()
+    profiler.discard()
+    assert len(profiler._active) == 1
+    assert profiler.end('route', 100) is None
+
+
+def test_samples_greenlets_under_eventlet(tmp_path):
+    pytest.importorskip('eventlet')
+    # monkey-patch la toan cuc nen chay trong process rieng
+    script = textwrap.dedent(f"""
+        import eventlet
+        eventlet.monkey_patch()
+        import time
+        from profiler import SamplingProfiler
+
+        profiler = SamplingProfiler({str(tmp_path)!r}, slow_ms=0, interval=0.002, green=True)
+
+        def cpu_request():
+            profiler.begin()
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                pass
+            print(profiler.end('cpu', 200))
+
+        def io_request():
+            profiler.begin()
+            eventlet.sleep(0.2)
+            print(profiler.end('io', 200))
+
+        pool = eventlet.GreenPool()
+        pool.spawn(io_request)
+        pool.spawn(cpu_request)
+        pool.waitall()
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30, cwd=root)
+    paths = result.stdout.split()
+    assert len(paths) == 2, result.stderr
+    stacks = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            stacks[path] = f.read()
+    assert any('cpu_request' in text and 'io_request' not in text for text in stacks.values())
+    assert any('io_request' in text and 'cpu_request' not in text for text in stacks.values())
@@ -0,0 +1,103 @@
+from werkzeug.datastructures import MultiDict
+
+from role_sync import apply_role_sync, form_role_ids, parse_shop_role_rows, plan_role_sync, rendered_role_ids
+
+
+def shop_form(*rows, rendered='111,222,333,444'):
+    """rows: (id, name, price, color, creator_id) theo thu tu cac input cua edit_config."""
+    form = MultiDict()
+    if rendered is not None:
+        form.add('shop_roles_rendered', rendered)
+    for role_id, name, price, color, creator_id in rows:
+        form.add('shop_role_id[]', role_id)
+        form.add('shop_role_name[]', name)
+        form.add('shop_role_price[]', price)
+        form.add('shop_role_color[]', color)
+        form.add('shop_role_creator_id[]', creator_id)
+    return form
+
+
+DB_ROLES = {
+    111: {'price': 100, 'creator_id': None},
+    222: {'price': 200, 'creator_id': 9},
+    333: {'price': 300, 'creator_id': None},
+    444: {'price': 400, 'creator_id': None},
+}
+DISCORD_ROLES = [
+    {'id': '111', 'name': 'Bronze', 'color': 0x111111},
+    {'id': '222', 'name': 'Silver', 'color': 0x222222},
+    {'id': '333', 'name': 'Gold', 'color': 0x333333},
+    {'id': '444', 'name': 'Platinum', 'color': 0x444444},
+]
+
+
+def plan_for(form):
+    return plan_role_sync(parse_shop_role_rows(form), DB_ROLES, DISCORD_ROLES, form_role_ids(form), rendered_role_ids(form))
+
+
+def test_blank_rows_are_skipped_not_deleted():
+    form = shop_form(
+        ('111', 'Bronze', '', '#111111', ''),
+        ('222', '  ', '250', '#222222', '9'),
+        ('333', 'Gold', '300', '#333333', ''),
+        ('444', 'Platinum', '400', '#444444', ''),
+    )
+    rows = parse_shop_role_rows(form)
+    assert [row['role_id'] for row in rows] == [333, 444]
+    plan = plan_for(form)
+    assert plan['delete'] == []
+    assert [row['role_id'] for row in plan['unchanged']] == [333, 444]
+
+
+def test_removed_rows_are_deleted():
+    plan = plan_for(shop_form(('333', 'Gold', '300', '#333333', '')))
+    assert plan['delete'] == [111, 222, 444]
+
+
+def test_roles_not_rendered_are_never_deleted():
+    # 444 do bot tao sau khi danh sach role duoc cache nen khong co tren form
+    plan = plan_for(shop_form(('333', 'Gold', '300', '#333333', ''), rendered='111,333'))
+    assert plan['delete'] == [111]
+
+
+def test_form_without_rendered_field_deletes_nothing():
+    plan = plan_for(shop_form(('333', 'Gold', '300', '#333333', ''), rendered=None))
+    assert plan['delete'] == []
+
+
+def test_unchanged_updated_created_and_rejected():
+    form = shop_form(
+        ('111', 'Bronze', '150', '#111111', ''),   # chi doi gia: khong goi Discord
+        ('222', 'Silver+', '200', '#222222', '9'),  # doi ten
+        ('333', 'Gold', '300', '#abcdef', ''),     # doi mau
+        ('444', 'Platinum', '400', '#444444', ''),
+        ('', 'New', '50', '', ''),
+        ('999', 'Foreign', '10', '#000000', ''),   # role khong thuoc shop cua guild
+    )
+    plan = plan_for(form)
+    assert [row['role_id'] for row in plan['unchanged']] == [111, 444]
+    assert [row['role_id'] for row in plan['update']] == [222, 333]
+    assert plan['create'] == [{'role_id': None, 'name': 'New', 'price': 50, 'color': 0x99aab5, 'creator_id': None}]
+    assert plan['rejected'] == [999]
+    assert plan['delete'] == []
+
+
+def test_apply_role_sync_keeps_failed_creates_out_of_db_rows():
+    plan = plan_for(shop_form(
+        ('111', 'Bronze', '100', '#111111', ''),
+        ('222', 'Silver+', '200', '#222222', '9'),
+        ('', 'Ok', '50', '#010101', ''),
+        ('', 'Broken', '60', '#020202', ''),
+    ))
+    calls = []
+
+    def api_request(endpoint, method='GET', payload=None):
+        calls.append((method, endpoint))
+        if method == 'POST':
+            return {'id': '777'} if payload['name'] == 'Ok' else None
+        return {}
+
+    saved, failed = apply_role_sync(plan, 1, api_request, lambda func, items: [func(item) for item in items])
+    assert failed == ['Broken']
+    assert sorted(row['role_id'] for row in saved) == [111, 222, 777]
+    assert sorted(c for c in calls if c[0] == 'DELETE') == [('DELETE', '/guilds/1/roles/333'), ('DELETE', '/guilds/1/roles/444')]
@@ -0,0 +1,98 @@
+import json
+import threading
+import uuid
+
+import psycopg2
+import socketio
+
+from socketio_brokers import MAX_NOTIFY_BYTES, MemoryManager, PostgresManager, create_client_manager
+
+
+def memory_worker(channel):
+    manager = MemoryManager(channel=channel)
+    server = socketio.Server(async_mode='threading', client_manager=manager)
+    received = []
+    event = threading.Event()
+
+    def handler(data):
+        received.append(data)
+        event.set()
+
+    manager.on_app_message(handler)
+    manager.initialize()
+    return server, manager, received, event
+
+
+def test_app_message_reaches_other_workers_only():
+    channel = f'test-{uuid.uuid4()}'
+    _, first, first_received, _ = memory_worker(channel)
+    _, _, second_received, second_event = memory_worker(channel)
+    first.publish_app_message({'type': 'log', 'entry': {'message': 'hi'}})
+    assert second_event.wait(2)
+    assert second_received == [{'type': 'log', 'entry': {'message': 'hi'}}]
+    assert first_received == []
+
+
+def test_filter_passes_socketio_messages_through():
+    manager = MemoryManager(channel=f'test-{uuid.uuid4()}')
+    message = {'method': 'emit', 'event': 'config_updated', 'data': [{}], 'namespace': '/', 'room': None}
+    assert manager._filter(json.dumps(message)) == message
+    assert manager._filter('not json') is None
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.fail_next:
+            self.conn.fail_next = False
+            self.conn.closed = True
+            raise psycopg2.OperationalError('server closed the connection')
+        self.conn.executed.append((sql, params))
+
+    def fetchone(self):
+        return (17,)
+
+
+class FakeConnection:
+    def __init__(self, fail_next=False):
+        self.executed = []
+        self.closed = False
+        self.autocommit = False
+        self.fail_next = fail_next
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def test_large_payload_is_stored_and_notify_carries_id():
+    conn = FakeConnection()
+    manager = PostgresManager('dsn', channel='ch', connect=lambda dsn: conn)
+    manager.publish_app_message({'blob': 'x' * (MAX_NOTIFY_BYTES + 100)})
+    (insert_sql, insert_params), (notify_sql, notify_params) = conn.executed
+    assert insert_sql.startswith('INSERT INTO dashboard_socketio_messages')
+    assert json.loads(insert_params[0])['data']['blob'].startswith('x')
+    assert notify_params == ('ch', '@17')
+
+
+def test_publish_reconnects_once_after_lost_connection():
+    broken, fresh = FakeConnection(fail_next=True), FakeConnection()
+    connections = [broken, fresh]
+    manager = PostgresManager('dsn', channel='ch', connect=lambda dsn: connections.pop(0))
+    manager.publish_app_message({'type': 'cache'})
+    assert broken.executed == []
+    (sql, params), = fresh.executed
+    assert json.loads(params[1])['data'] == {'type': 'cache'}
+
+
+def test_create_client_manager():
+    assert create_client_manager('') is None
+    assert isinstance(create_client_manager('memory', channel=f'test-{uuid.uuid4()}'), MemoryManager)
+    assert isinstance(create_client_manager('postgres', dsn='dsn'), PostgresManager)